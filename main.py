@@ -3,12 +3,13 @@ Easy Background - CLI
 Interfaz de línea de comandos para cambiar fondos de imágenes a blanco
 """
 
+import contextlib
 import os
 import sys
 import glob
 import time
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import click
 from PIL import Image
@@ -18,15 +19,63 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
     from src.background_remover import BackgroundRemover
-    from src.utils import validate_image_path, get_file_list, format_file_size
+    from src.utils import validate_image_path, get_file_list, format_file_size, parse_color
+    from src.archives import (
+        ArchiveWriter, is_archive_path, iter_archive_images
+    )
+    from src.pipeline import Pipeline, DirectoryWriter, output_paths
+    from src.stdio_server import StdioServer
 except ImportError as e:
     print(f"Error importando módulos: {e}")
     print("Asegúrate de estar en el directorio raíz del proyecto")
     sys.exit(1)
 
 
+def _run_batch(pipeline: Pipeline, items, writer, prefix: str, verbose: bool,
+               length: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Procesa un lote de imágenes con el pipeline y escribe los resultados en el destino.
+
+    Returns:
+        Tuple[int, int]: Imágenes procesadas correctamente y total de imágenes
+    """
+    success_count = 0
+    total = 0
+    paths = {}
+
+    def consume(results):
+        nonlocal success_count, total
+        for name, error, info in results:
+            total += 1
+            if error is None:
+                # passthrough: la segmentación falló y se guardó la imagen original
+                if info['path'] != 'passthrough':
+                    success_count += 1
+                paths[info['path']] = paths.get(info['path'], 0) + 1
+                if verbose:
+                    click.echo(f"\n  {name}: {info['path']} ({info['model']}, {info['elapsed']:.2f}s)")
+            elif verbose:
+                click.echo(f"\n❌ Error procesando {name}: {error}")
+
+    results = pipeline.run(items, writer, prefix=prefix)
+    if length:
+        with click.progressbar(results, length=length, label='Procesando imágenes') as bar:
+            consume(bar)
+    else:
+        # Entrada en streaming: el número de imágenes no se conoce de antemano
+        consume(results)
+
+    # Avisar si alguna imagen no se procesó con el modelo principal
+    degraded = {path: count for path, count in paths.items() if path in ('fallback', 'passthrough')}
+    if degraded:
+        summary = ', '.join(f"{path}: {count}" for path, count in degraded.items())
+        click.echo(click.style(f"⚠️  Imágenes sin el modelo principal: {summary}", fg='yellow'))
+
+    return success_count, total
+
+
 @click.command()
-@click.argument('input_path', type=click.Path(exists=True))
+@click.argument('input_path', type=click.Path(exists=True), required=False)
 @click.option('-o', '--output', type=click.Path(), 
               help='Ruta de salida (archivo o directorio)')
 @click.option('-m', '--model', default='u2net',
@@ -44,15 +93,39 @@ except ImportError as e:
               help='Mostrar información detallada')
 @click.option('--gpu/--no-gpu', default=True,
               help='Usar GPU para acelerar procesamiento')
-@click.option('--output-format', default='white-bg',
-              type=click.Choice(['white-bg', 'transparent-png']),
-              help='Formato de salida: fondo blanco o PNG transparente')
-def main(input_path: str, output: Optional[str], model: str, resize: Optional[int],
-         prefix: str, recursive: bool, quality: int, verbose: bool, gpu: bool, output_format: str):
+@click.option('--output-format', 'output_formats', default=['white-bg'], multiple=True,
+              type=click.Choice(['white-bg', 'transparent-png', 'mask', 'custom-bg']),
+              help='Formato de salida: fondo blanco, PNG transparente, máscara o fondo '
+                   'personalizado. Se puede repetir para generar varias salidas con una '
+                   'sola inferencia')
+@click.option('--background-color', metavar='COLOR',
+              help="Color de fondo personalizado ('#f5f5f5', 'lightgray' o '245,245,245')")
+@click.option('--background-image', type=click.Path(exists=True, dir_okay=False),
+              help='Imagen de fondo personalizada (se escala una vez por tamaño y se reutiliza)')
+@click.option('--deadline', type=click.FloatRange(min=0, min_open=True), metavar='SECONDS',
+              help='Tiempo máximo por imagen; si no se alcanza se usa el modelo rápido')
+@click.option('--fallback-model', default='u2netp',
+              type=click.Choice(['u2net', 'u2netp', 'u2net_human_seg', 'silueta', 'isnet-general-use']),
+              help='Modelo rápido (sobre la imagen reducida) al superar --deadline')
+@click.option('--precision', default='fp32', type=click.Choice(['fp32', 'int8']),
+              help='Precisión de inferencia: fp32 o int8 (pesos cuantizados, más rápido en CPU)')
+@click.option('--refine-edges', is_flag=True,
+              help='Refinar el alpha en una banda estrecha alrededor del borde (pelo, pelaje)')
+@click.option('--edge-band', default=8, type=click.IntRange(1, 64), metavar='PX',
+              help='Ancho en píxeles de la banda de refinamiento de bordes')
+@click.option('--serve-stdio', is_flag=True,
+              help='Cargar el modelo una vez y atender peticiones NDJSON por stdin/stdout')
+def main(input_path: Optional[str], output: Optional[str], model: str, resize: Optional[int],
+         prefix: str, recursive: bool, quality: int, verbose: bool, gpu: bool,
+         output_formats: Tuple[str, ...],
+         background_color: Optional[str], background_image: Optional[str],
+         deadline: Optional[float], fallback_model: str, precision: str,
+         refine_edges: bool, edge_band: int, serve_stdio: bool):
     """
     Procesa imágenes para cambiar el fondo a blanco o crear PNG transparente.
     
-    INPUT_PATH puede ser un archivo de imagen o un directorio con imágenes.
+    INPUT_PATH puede ser un archivo de imagen, un directorio con imágenes o un
+    archivo comprimido (.tar, .tar.gz, .zip).
     
     Ejemplos:
     
@@ -69,8 +142,29 @@ def main(input_path: str, output: Optional[str], model: str, resize: Optional[in
         # Usar modelo específico y redimensionar
         python main.py imagen.jpg -o resultado.jpg -m u2netp --resize 1024
         
+        # Inferencia INT8 en CPU (la copia cuantizada se genera la primera vez)
+        python main.py fotos/ -o resultados/ --precision int8 --no-gpu
+        
+        # Límite de 0.5s por imagen con respaldo en u2netp
+        python main.py fotos/ -o resultados/ -m isnet-general-use --deadline 0.5
+        
+        # Refinar bordes de pelo y pelaje
+        python main.py retrato.jpg -o resultado.png --output-format transparent-png --refine-edges
+        
+        # Fondo blanco, PNG transparente y máscara con una sola inferencia
+        python main.py imagen.jpg --output-format white-bg --output-format transparent-png --output-format mask
+        
         # Procesar recursivamente con PNG transparente
         python main.py fotos/ -o resultados/ -r --output-format transparent-png
+        
+        # Componer sobre un fondo de marca (se escala una sola vez por tamaño)
+        python main.py fotos/ -o resultados/ --background-image marca.jpg
+        
+        # Procesar un tarball en streaming y escribir los resultados en otro
+        python main.py fotos.tar.gz -o resultados.tar.gz
+        
+        # Co-proceso persistente: peticiones NDJSON por stdin, respuestas por stdout
+        python main.py --serve-stdio -m u2netp
     """
     
     # Configurar logging si es verbose
@@ -79,30 +173,111 @@ def main(input_path: str, output: Optional[str], model: str, resize: Optional[in
         logging.basicConfig(level=logging.INFO, 
                           format='%(asctime)s - %(levelname)s - %(message)s')
     
+    # Fondo personalizado: color o imagen en lugar del blanco
+    try:
+        color = parse_color(background_color) if background_color else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--background-color')
+    background = {'background_color': color, 'background_image': background_image}
+    # El pipeline sustituye white-bg por custom-bg cuando se indica un fondo
+    output_formats = list(dict.fromkeys(output_formats))
+    if 'custom-bg' in output_formats and not (color or background_image):
+        raise click.UsageError("custom-bg requiere --background-color o --background-image")
+    
+    # Modo co-proceso: stdout queda reservado para las respuestas del protocolo.
+    # La carga del modelo (descarga, cuantización) también escribe en stdout,
+    # así que se hace con la salida ya redirigida a stderr
+    if serve_stdio:
+        click.echo(f"Easy Background: sirviendo por stdio con el modelo {model}", err=True)
+        protocol_out = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            try:
+                generator = BackgroundRemover(model_name=model, enable_gpu=gpu,
+                                              refine_edges=refine_edges, edge_band=edge_band,
+                                              deadline=deadline, fallback_model=fallback_model,
+                                              precision=precision)
+            except Exception as e:
+                click.echo(f"Easy Background: error cargando el modelo: {e}", err=True)
+                sys.exit(1)
+            server = StdioServer(generator, default_formats=output_formats,
+                                 default_resize=resize, default_quality=quality,
+                                 default_background=background)
+            handled = server.serve(stdout=protocol_out)
+        click.echo(f"Easy Background: {handled} peticiones atendidas", err=True)
+        return
+    
+    if not input_path:
+        raise click.UsageError("Falta el argumento INPUT_PATH (o usa --serve-stdio)")
+    
     # Mostrar información inicial
     click.echo(click.style("🎨 Easy Background", fg='blue', bold=True))
-    click.echo(f"Modelo: {model}")
-    click.echo(f"Formato de salida: {'PNG transparente' if output_format == 'transparent-png' else 'Fondo blanco'}")
+    click.echo(f"Modelo: {model}" + (f" ({precision})" if precision != 'fp32' else ''))
     
     try:
         # Inicializar generador
         click.echo("Inicializando generador...")
-        generator = BackgroundRemover(model_name=model, enable_gpu=gpu)
+        generator = BackgroundRemover(model_name=model, enable_gpu=gpu,
+                                      refine_edges=refine_edges, edge_band=edge_band,
+                                      deadline=deadline, fallback_model=fallback_model,
+                                      precision=precision)
+        pipeline = Pipeline(generator, output_formats, resize_max=resize,
+                            quality=quality, background=background)
+        format_labels = {'white-bg': 'Fondo blanco', 'transparent-png': 'PNG transparente',
+                         'mask': 'Máscara', 'custom-bg': 'Fondo personalizado'}
+        click.echo(f"Formato de salida: "
+                   f"{', '.join(format_labels[f] for f in pipeline.output_formats)}")
         
         # Mostrar información del modelo
         if verbose:
             model_info = generator.get_model_info()
             click.echo(f"Información del modelo: {model_info}")
         
-        # Obtener lista de archivos
-        if os.path.isfile(input_path):
+        start_time = time.time()
+        
+        # Obtener las imágenes a procesar
+        if os.path.isfile(input_path) and is_archive_path(input_path):
+            # Archivo comprimido: los miembros se decodifican en streaming desde memoria
+            click.echo(f"📦 Procesando archivo comprimido: {os.path.basename(input_path)}")
+            items = iter_archive_images(input_path)
+            length = None
+            
+        elif os.path.isfile(input_path):
             if not validate_image_path(input_path):
                 click.echo(click.style(f"❌ Error: {input_path} no es una imagen válida", fg='red'))
                 return
             
-            image_files = [input_path]
             click.echo(f"📁 Procesando archivo: {os.path.basename(input_path)}")
             
+            batch_output = output and (is_archive_path(output) or os.path.isdir(output))
+            if not batch_output:
+                # Procesar archivo único: la ruta de salida se deriva de -o o de la entrada
+                paths = output_paths(output or input_path, pipeline.output_formats,
+                                     explicit=bool(output))
+                click.echo(f"🔄 Procesando: {os.path.basename(input_path)}")
+                
+                with click.progressbar(length=100, label='Procesando') as bar:
+                    info = pipeline.process(input_path, paths, DirectoryWriter())
+                    bar.update(100)
+                
+                if info['path'] == 'passthrough':
+                    click.echo(click.style(f"⚠️  No se pudo segmentar la imagen ({info['error']}); "
+                                           f"se guardó sin quitar el fondo", fg='yellow'))
+                elif info['path'] != 'primary' or verbose:
+                    click.echo(f"Segmentación: {info['path']} ({info['model']}, {info['elapsed']:.2f}s)")
+                
+                # Mostrar información del resultado
+                for path in paths.values():
+                    if os.path.exists(path) and info['path'] != 'passthrough':
+                        file_size = format_file_size(os.path.getsize(path))
+                        click.echo(click.style(f"✅ Completado: {path} ({file_size})", fg='green'))
+                
+                elapsed_time = time.time() - start_time
+                click.echo(f"⏱️  Tiempo total: {elapsed_time:.2f} segundos")
+                return
+            
+            items = [(os.path.basename(input_path), input_path)]
+            length = 1
+            
         elif os.path.isdir(input_path):
             image_files = get_file_list(input_path, recursive=recursive)
             if not image_files:
@@ -110,106 +285,25 @@ def main(input_path: str, output: Optional[str], model: str, resize: Optional[in
                 return
             
             click.echo(f"📁 Encontradas {len(image_files)} imágenes en {input_path}")
+            # Conservar las carpetas relativas (con -r, sub/a.jpg y a.jpg no colisionan)
+            items = [(os.path.relpath(input_file, input_path), input_file) for input_file in image_files]
+            length = len(image_files)
             
         else:
             click.echo(click.style(f"❌ Error: {input_path} no existe", fg='red'))
             return
         
-        # Determinar rutas de salida
-        if not output:
-            # Generar nombre de salida automático
-            if len(image_files) == 1:
-                input_file = image_files[0]
-                name, ext = os.path.splitext(input_file)
-                if output_format == 'transparent-png':
-                    output = f"{name}_transparent.png"
-                else:
-                    output = f"{name}_processed{ext}"
-            else:
-                output = "output/"
+        # Procesamiento por lotes hacia un directorio o un archivo comprimido
+        output = output or "output/"
+        writer = ArchiveWriter(output) if is_archive_path(output) else DirectoryWriter(output)
         
-        # Procesar archivos
-        start_time = time.time()
+        if length:
+            click.echo(f"🔄 Procesando {length} imágenes...")
         
-        if len(image_files) == 1:
-            # Procesar archivo único
-            input_file = image_files[0]
-            click.echo(f"🔄 Procesando: {os.path.basename(input_file)}")
-            
-            # Ajustar extensión según formato de salida
-            if output_format == 'transparent-png' and output and not output.lower().endswith('.png'):
-                name, _ = os.path.splitext(output)
-                output = f"{name}.png"
-            
-            with click.progressbar(length=100, label='Procesando') as bar:
-                if output_format == 'transparent-png':
-                    # Solo remover fondo, mantener transparencia
-                    result = generator.remove_background(input_file)
-                    if resize:
-                        from src.utils import resize_image
-                        result = resize_image(result, resize)
-                    if output:
-                        from src.utils import ensure_output_directory
-                        ensure_output_directory(output)
-                        result.save(output, "PNG")
-                else:
-                    # Procesamiento normal con fondo blanco
-                    result = generator.process_image(
-                        input_file, 
-                        output_path=output,
-                        resize_max=resize
-                    )
-                bar.update(100)
-            
-            # Mostrar información del resultado
-            if os.path.exists(output):
-                file_size = format_file_size(os.path.getsize(output))
-                click.echo(click.style(f"✅ Completado: {output} ({file_size})", fg='green'))
-            
-        else:
-            # Procesamiento por lotes
-            if not os.path.isdir(output):
-                os.makedirs(output, exist_ok=True)
-            
-            click.echo(f"🔄 Procesando {len(image_files)} imágenes...")
-            
-            success_count = 0
-            with click.progressbar(image_files, label='Procesando imágenes') as bar:
-                for input_file in bar:
-                    try:
-                        # Generar nombre de salida
-                        filename = os.path.basename(input_file)
-                        name, ext = os.path.splitext(filename)
-                        
-                        # Ajustar extensión según formato de salida
-                        if output_format == 'transparent-png':
-                            output_file = os.path.join(output, f"{prefix}{name}.png")
-                        else:
-                            output_file = os.path.join(output, f"{prefix}{name}{ext}")
-                        
-                        # Procesar imagen según formato
-                        if output_format == 'transparent-png':
-                            # Solo remover fondo, mantener transparencia
-                            result = generator.remove_background(input_file)
-                            if resize:
-                                from src.utils import resize_image
-                                result = resize_image(result, resize)
-                            result.save(output_file, "PNG")
-                        else:
-                            # Procesamiento normal con fondo blanco
-                            generator.process_image(
-                                input_file,
-                                output_path=output_file,
-                                resize_max=resize
-                            )
-                        success_count += 1
-                        
-                    except Exception as e:
-                        if verbose:
-                            click.echo(f"\n❌ Error procesando {filename}: {e}")
-                        continue
-            
-            click.echo(click.style(f"✅ Completado: {success_count}/{len(image_files)} imágenes procesadas", fg='green'))
+        with writer:
+            success_count, total = _run_batch(pipeline, items, writer, prefix, verbose, length)
+        
+        click.echo(click.style(f"✅ Completado: {success_count}/{total} imágenes procesadas -> {output}", fg='green'))
         
         # Mostrar tiempo total
         elapsed_time = time.time() - start_time
@@ -281,13 +375,184 @@ def test(model: str):
         click.echo(click.style(f"❌ Error en la prueba: {e}", fg='red'))
 
 
+@cli.command('benchmark-matting')
+@click.option('--size', default=1024, type=int, help='Lado de la imagen sintética')
+@click.option('--band', default=8, type=int, help='Ancho de la banda de refinamiento')
+@click.option('--repeat', default=3, type=int, help='Repeticiones por medición')
+@click.option('--pymatting', 'with_pymatting', is_flag=True,
+              help='Comparar con matting closed-form de imagen completa (requiere pymatting, lento)')
+def benchmark_matting(size: int, band: int, repeat: int, with_pymatting: bool):
+    """Compara el refinamiento por banda con el matting de imagen completa
+    
+    Sin --pymatting solo se mide el ahorro de omitir los tiles fuera de la
+    banda (el mismo solver de filtros de caja sobre todos los tiles); con
+    --pymatting se compara además con matting closed-form real (Levin et al.)
+    sobre la imagen completa, en tiempo y en error en la banda.
+    """
+    import numpy as np
+    from src.matting import build_trimap, refine_alpha_band
+    
+    click.echo(click.style("⏱️  Benchmark de refinamiento de bordes", fg='blue', bold=True))
+    
+    # Imagen sintética con alpha real conocido: disco con borde difuso y
+    # colores de objeto y fondo en gradiente
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32)
+    distance = np.hypot(yy - size / 2, xx - size / 2) - size * 0.3
+    true_alpha = np.clip(0.5 - distance / 6.0, 0.0, 1.0)
+    foreground = np.stack([0.9 - xx / size * 0.3, 0.3 + yy / size * 0.2,
+                           np.full_like(xx, 0.2)], axis=2)
+    background = np.stack([np.full_like(xx, 0.1), 0.4 + xx / size * 0.3,
+                           0.9 - yy / size * 0.2], axis=2)
+    image = true_alpha[:, :, np.newaxis] * foreground + (1 - true_alpha[:, :, np.newaxis]) * background
+    image = (image * 255).astype(np.uint8)
+    hard_alpha = np.where(true_alpha > 0.5, 255, 0).astype(np.uint8)
+    
+    def measure(fn):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+    
+    unknown = build_trimap(hard_alpha, band) == 128
+    band_time, (refined, refined_colors) = measure(lambda: refine_alpha_band(image, hard_alpha, band=band))
+    full_time, _ = measure(lambda: refine_alpha_band(image, hard_alpha, band=band, restrict=False))
+    
+    def band_error(alpha):
+        return float(np.mean(np.abs(alpha[unknown] / 255.0 - true_alpha[unknown])))
+    
+    click.echo(f"Imagen: {size}x{size}px, banda: {band}px "
+               f"({unknown.mean() * 100:.2f}% de los píxeles)")
+    click.echo(f"  • Refinamiento por banda:         {band_time * 1000:8.1f} ms")
+    click.echo(f"  • Mismo solver sin omitir tiles:  {full_time * 1000:8.1f} ms "
+               f"(x{full_time / band_time:.1f}, solo el ahorro de omitir tiles)")
+    
+    cf_alpha = None
+    if with_pymatting:
+        try:
+            from pymatting import estimate_alpha_cf
+        except ImportError:
+            click.echo("  • pymatting no está disponible (pip install pymatting), se omite la comparación")
+        else:
+            trimap = np.where(hard_alpha > 0, 1.0, 0.0)
+            trimap[unknown] = 0.5
+            cf_time, cf_alpha = measure(lambda: estimate_alpha_cf(image / 255.0, trimap))
+            cf_alpha = np.round(np.clip(cf_alpha, 0.0, 1.0) * 255)
+            click.echo(f"  • Closed-form, imagen completa:   {cf_time * 1000:8.1f} ms "
+                       f"(x{cf_time / band_time:.1f})")
+    
+    # Error de color del objeto en los píxeles de la banda con objeto visible:
+    # el color original arrastra el fondo (halo), el estimado debería no hacerlo
+    visible = unknown & (true_alpha > 0.05)
+    
+    def color_error(colors):
+        return float(np.mean(np.abs(colors[visible] / 255.0 - foreground[visible])))
+    
+    click.echo(f"Error medio en la banda: máscara dura {band_error(hard_alpha):.4f} "
+               f"→ refinada {band_error(refined):.4f}"
+               + (f" (closed-form {band_error(cf_alpha):.4f})" if cf_alpha is not None else ''))
+    click.echo(f"Error de color del objeto en la banda: original {color_error(image):.4f} "
+               f"→ estimado {color_error(refined_colors):.4f}")
+
+
+@cli.command()
+@click.option('-m', '--model', default='u2net',
+              type=click.Choice(['u2net', 'u2netp', 'u2net_human_seg', 'silueta', 'isnet-general-use']),
+              help='Modelo de rembg a cuantizar')
+@click.option('--model-path', type=click.Path(exists=True, dir_okay=False),
+              help='Cuantizar un archivo ONNX local en lugar de un modelo de rembg')
+@click.option('-o', '--output', type=click.Path(),
+              help='Ruta del modelo cuantizado (por defecto modelo.int8.onnx)')
+@click.option('--per-channel', is_flag=True, help='Cuantizar por canal')
+@click.option('--force', is_flag=True, help='Regenerar aunque ya exista')
+def quantize(model: str, model_path: Optional[str], output: Optional[str],
+             per_channel: bool, force: bool):
+    """Genera una copia INT8 (cuantización dinámica) de un modelo ONNX"""
+    from src.quantization import model_path as rembg_model_path, quantize_model
+    
+    try:
+        input_path = model_path or rembg_model_path(model)
+        output_path = quantize_model(input_path, output, per_channel=per_channel, force=force)
+        click.echo(click.style(f"✅ Modelo cuantizado: {output_path} "
+                               f"({format_file_size(os.path.getsize(output_path))}, "
+                               f"original {format_file_size(os.path.getsize(input_path))})",
+                               fg='green'))
+    except Exception as e:
+        click.echo(click.style(f"❌ Error cuantizando: {e}", fg='red'))
+        sys.exit(1)
+
+
+@cli.command('benchmark-quantized')
+@click.option('-m', '--model', default='u2net',
+              type=click.Choice(['u2net', 'u2netp', 'u2net_human_seg', 'silueta', 'isnet-general-use']),
+              help='Modelo de rembg a comparar')
+@click.option('--model-path', type=click.Path(exists=True, dir_okay=False),
+              help='Archivo ONNX local a comparar (p. ej. un modelo pequeño de prueba)')
+@click.option('--samples', default=4, type=int, help='Número de entradas aleatorias')
+@click.option('--repeat', default=3, type=int, help='Repeticiones por entrada')
+@click.option('--images', type=click.Path(exists=True, file_okay=False),
+              help='Directorio de imágenes para comparar las máscaras reales de rembg')
+def benchmark_quantized(model: str, model_path: Optional[str], samples: int,
+                        repeat: int, images: Optional[str]):
+    """Compara velocidad e IoU de las máscaras entre fp32 e INT8"""
+    import numpy as np
+    import onnxruntime as ort
+    from src.quantization import (
+        model_path as rembg_model_path, quantize_model, compare_models, mask_iou,
+        sample_inputs
+    )
+    
+    click.echo(click.style("⏱️  Benchmark fp32 vs INT8", fg='blue', bold=True))
+    
+    try:
+        fp32_path = model_path or rembg_model_path(model)
+        int8_path = quantize_model(fp32_path)
+        
+        fp32_session = ort.InferenceSession(fp32_path, providers=['CPUExecutionProvider'])
+        report = compare_models(fp32_path, int8_path,
+                                sample_inputs(fp32_session, count=samples), repeat=repeat)
+        
+        click.echo(f"Modelo: {fp32_path}")
+        click.echo(f"  • Tamaño: {format_file_size(report['fp32_size'])} → "
+                   f"{format_file_size(report['int8_size'])}")
+        click.echo(f"  • fp32: {report['fp32_ms']:.1f} ms   int8: {report['int8_ms']:.1f} ms   "
+                   f"speedup: x{report['speedup']:.2f}")
+        click.echo(f"  • IoU de máscaras (entradas aleatorias): {report['iou']:.4f}")
+        
+        # Con imágenes reales se compara el resultado completo de rembg
+        if images and not model_path:
+            image_files = get_file_list(images)
+            fp32_remover = BackgroundRemover(model_name=model, enable_gpu=False)
+            int8_remover = BackgroundRemover(model_name=model, enable_gpu=False, precision='int8')
+            
+            fp32_times, int8_times, ious = [], [], []
+            for image_file in image_files:
+                fp32_result, fp32_info = fp32_remover.remove_background_with_info(image_file)
+                int8_result, int8_info = int8_remover.remove_background_with_info(image_file)
+                fp32_times.append(fp32_info['elapsed'])
+                int8_times.append(int8_info['elapsed'])
+                ious.append(mask_iou(np.array(fp32_result.getchannel('A')) > 127,
+                                     np.array(int8_result.getchannel('A')) > 127))
+            
+            if image_files:
+                fp32_mean, int8_mean = np.mean(fp32_times), np.mean(int8_times)
+                click.echo(f"Imágenes ({len(image_files)}): fp32 {fp32_mean * 1000:.1f} ms   "
+                           f"int8 {int8_mean * 1000:.1f} ms   speedup: x{fp32_mean / int8_mean:.2f}   "
+                           f"IoU: {np.mean(ious):.4f} (mín. {np.min(ious):.4f})")
+        
+    except Exception as e:
+        click.echo(click.style(f"❌ Error en el benchmark: {e}", fg='red'))
+        sys.exit(1)
+
+
 if __name__ == '__main__':
     # Si se ejecuta directamente, usar el comando principal
     if len(sys.argv) == 1:
         cli(['--help'])
     else:
         # Detectar si es comando del grupo o comando principal
-        if sys.argv[1] in ['models', 'test']:
+        if sys.argv[1] in ['models', 'test', 'benchmark-matting', 'quantize', 'benchmark-quantized']:
             cli()
         else:
             main()
\ No newline at end of file
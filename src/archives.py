@@ -0,0 +1,208 @@
+"""
+Easy Background - Archivos comprimidos
+Lectura y escritura en streaming de imágenes dentro de archivos .tar/.tar.gz/.zip
+"""
+
+import io
+import os
+import tarfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Iterator, Tuple
+
+from PIL import Image
+
+try:
+    from .utils import get_supported_formats
+except ImportError:
+    # Importación directa cuando se ejecuta como script
+    from utils import get_supported_formats
+
+
+ARCHIVE_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz', '.zip')
+
+
+def is_archive_path(path: str) -> bool:
+    """
+    Indica si la ruta corresponde a un archivo comprimido soportado.
+
+    Args:
+        path (str): Ruta a comprobar
+
+    Returns:
+        bool: True si la extensión es de un archivo .tar/.tar.gz/.zip
+    """
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_image_member(name: str) -> bool:
+    """Comprueba si el nombre de un miembro del archivo es una imagen soportada."""
+    basename = os.path.basename(name)
+    if not basename or basename.startswith('.'):
+        return False
+    return Path(basename).suffix.lower() in get_supported_formats()
+
+
+def _safe_member_name(name: str) -> str:
+    """Normaliza el nombre de un miembro para que no pueda salir del directorio de salida."""
+    parts = [part for part in name.replace('\\', '/').split('/')
+             if part and part not in ('.', '..')]
+    return '/'.join(parts)
+
+
+def iter_archive_images(archive_path: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    Recorre las imágenes de un archivo comprimido sin extraerlo a disco.
+
+    Los archivos tar se leen en modo streaming (un miembro cada vez), por lo
+    que la memoria usada está acotada por el tamaño de la imagen más grande.
+
+    Args:
+        archive_path (str): Ruta al archivo .tar/.tar.gz/.zip
+
+    Yields:
+        Tuple[str, bytes]: Nombre relativo (normalizado) del miembro y su contenido
+    """
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_image_member(info.filename):
+                    continue
+                yield _safe_member_name(info.filename), archive.read(info)
+    else:
+        with tarfile.open(archive_path, mode='r|*') as archive:
+            for member in archive:
+                if not member.isfile() or not _is_image_member(member.name):
+                    continue
+                handle = archive.extractfile(member)
+                if handle is None:
+                    continue
+                yield _safe_member_name(member.name), handle.read()
+
+
+def load_image_bytes(data: bytes) -> Image.Image:
+    """
+    Decodifica una imagen desde bytes en memoria.
+
+    Args:
+        data (bytes): Contenido del archivo de imagen
+
+    Returns:
+        PIL.Image: Imagen decodificada
+    """
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def encode_image(image: Image.Image, filename: str, quality: int = 95) -> bytes:
+    """
+    Codifica una imagen en memoria usando el formato indicado por la extensión.
+
+    Args:
+        image (PIL.Image): Imagen a codificar
+        filename (str): Nombre de archivo del que se deduce el formato
+        quality (int): Calidad de compresión JPEG (1-100)
+
+    Returns:
+        bytes: Contenido codificado
+    """
+    ext = Path(filename).suffix.lower()
+    image_format = Image.registered_extensions().get(ext, 'PNG')
+
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, image_format, quality=quality, optimize=True)
+    else:
+        image.save(buffer, image_format)
+    return buffer.getvalue()
+
+
+class ArchiveWriter:
+    """
+    Escritor en streaming de resultados hacia un archivo .tar/.tar.gz/.zip.
+
+    Cada resultado se añade en cuanto se genera, sin archivos temporales,
+    por lo que solo se mantiene en memoria la imagen que se está escribiendo.
+    """
+
+    def __init__(self, archive_path: str):
+        """
+        Abre el archivo de salida.
+
+        Args:
+            archive_path (str): Ruta del archivo de salida
+        """
+        if not is_archive_path(archive_path):
+            raise ValueError(f"Formato de archivo no soportado: {archive_path}")
+
+        self.archive_path = archive_path
+        self.count = 0
+
+        output_dir = os.path.dirname(archive_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        lower = archive_path.lower()
+        if lower.endswith('.zip'):
+            # Las imágenes ya están comprimidas: almacenarlas sin recomprimir
+            self._zip = zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_STORED)
+            self._tar = None
+        else:
+            if lower.endswith(('.tar.gz', '.tgz')):
+                mode = 'w|gz'
+            elif lower.endswith('.tar.bz2'):
+                mode = 'w|bz2'
+            elif lower.endswith('.tar.xz'):
+                mode = 'w|xz'
+            else:
+                mode = 'w|'
+            self._tar = tarfile.open(archive_path, mode=mode)
+            self._zip = None
+
+    def add(self, name: str, data: bytes) -> None:
+        """
+        Añade un miembro al archivo.
+
+        Args:
+            name (str): Nombre del miembro dentro del archivo
+            data (bytes): Contenido del miembro
+        """
+        name = name.replace(os.sep, '/')
+        if self._zip is not None:
+            self._zip.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name=name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._tar.addfile(info, io.BytesIO(data))
+        self.count += 1
+
+    def add_image(self, name: str, image: Image.Image, quality: int = 95) -> None:
+        """
+        Codifica una imagen y la añade al archivo.
+
+        Args:
+            name (str): Nombre del miembro (su extensión define el formato)
+            image (PIL.Image): Imagen a guardar
+            quality (int): Calidad de compresión JPEG (1-100)
+        """
+        self.add(name, encode_image(image, name, quality=quality))
+
+    def close(self) -> None:
+        """Cierra el archivo de salida."""
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
@@ -5,6 +5,9 @@ Módulo principal para remover fondos y cambiar a blanco RGB(255,255,255)
 
 import os
 import logging
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from typing import Optional, Union, List, Tuple
 import numpy as np
 from PIL import Image
@@ -20,14 +23,74 @@ except ImportError:
 try:
     from .utils import (
         validate_image_path, ensure_output_directory, pil_to_numpy, 
-        numpy_to_pil, create_white_background, resize_image, blend_images
+        numpy_to_pil, resize_image, blend_images,
+        BackgroundCache
     )
+    from .matting import refine_alpha_band
+    from .quantization import PRECISIONS, load_quantized_session
 except ImportError:
     # Importación directa cuando se ejecuta como script
     from utils import (
         validate_image_path, ensure_output_directory, pil_to_numpy, 
-        numpy_to_pil, create_white_background, resize_image, blend_images
+        numpy_to_pil, resize_image, blend_images,
+        BackgroundCache
     )
+    from matting import refine_alpha_band
+    from quantization import PRECISIONS, load_quantized_session
+
+
+# Sesiones de rembg compartidas por (modelo, precisión); se cargan una sola vez
+_SESSION_REGISTRY = {}
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session(model_name: str, precision: str = 'fp32'):
+    """
+    Devuelve la sesión de rembg de un modelo, cargándola solo la primera vez.
+    
+    Args:
+        model_name (str): Nombre del modelo
+        precision (str): 'fp32' (pesos originales) o 'int8' (copia cuantizada,
+            que se genera la primera vez junto al modelo original)
+        
+    Returns:
+        Sesión de rembg del modelo
+    """
+    if not REMBG_AVAILABLE:
+        raise RuntimeError("rembg no está disponible")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precisión no soportada: {precision}")
+    
+    key = (model_name, precision)
+    with _SESSION_LOCK:
+        if key not in _SESSION_REGISTRY:
+            if precision == 'int8':
+                _SESSION_REGISTRY[key] = load_quantized_session(model_name)
+            else:
+                _SESSION_REGISTRY[key] = new_session(model_name)
+        return _SESSION_REGISTRY[key]
+
+
+def _run_with_timeout(fn, timeout: float):
+    """
+    Ejecuta fn en un hilo y espera como máximo timeout segundos.
+    
+    Si se agota el tiempo se lanza TimeoutError; el hilo no se puede
+    interrumpir y termina en segundo plano descartando su resultado.
+    """
+    future = Future()
+    
+    def target():
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=target, daemon=True).start()
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise TimeoutError(f"Se superó el límite de {timeout:.2f}s")
 
 
 class BackgroundRemover:
@@ -47,44 +110,105 @@ class BackgroundRemover:
         'isnet-general-use', # Modelo de alta calidad
     ]
     
-    def __init__(self, model_name: str = 'u2net', enable_gpu: bool = True):
+    # Coste relativo por modelo: (segundos fijos, segundos por megapíxel) en CPU.
+    # Solo da la forma de la curva: la escala se calibra con tiempos reales del
+    # equipo (CPU o GPU) y hasta tener uno no se descarta el modelo por predicción.
+    MODEL_COST = {
+        'u2net': (0.6, 0.05),
+        'u2netp': (0.15, 0.04),
+        'u2net_human_seg': (0.6, 0.05),
+        'silueta': (0.6, 0.05),
+        'isnet-general-use': (2.0, 0.08),
+    }
+    
+    # Imágenes seguidas resueltas con el modelo rápido por predicción tras las
+    # que se vuelve a probar el modelo principal para recalibrar su coste
+    PROBE_INTERVAL = 20
+    
+    def __init__(self, model_name: str = 'u2net', enable_gpu: bool = True,
+                 refine_edges: bool = False, edge_band: int = 8,
+                 deadline: Optional[float] = None, fallback_model: str = 'u2netp',
+                 fallback_max_size: int = 512, precision: str = 'fp32'):
         """
         Inicializa el removedor de fondos.
         
         Args:
             model_name (str): Nombre del modelo a usar para segmentación
             enable_gpu (bool): Si usar GPU para acelerar el procesamiento
+            refine_edges (bool): Si refinar el alpha en una banda alrededor del borde
+            edge_band (int): Ancho en píxeles de la banda de refinamiento
+            deadline (float): Tiempo máximo por imagen en segundos (opcional)
+            fallback_model (str): Modelo rápido a usar si no se cumple el límite
+            fallback_max_size (int): Tamaño máximo de la imagen en el modo rápido
+            precision (str): 'fp32' o 'int8' (pesos cuantizados, más rápido en CPU;
+                si no se puede cargar se lanza RuntimeError en lugar de usar OpenCV)
         """
         self.model_name = model_name
         self.enable_gpu = enable_gpu
+        self.refine_edges = refine_edges
+        self.edge_band = edge_band
+        self.deadline = deadline
+        self.fallback_model = fallback_model
+        self.fallback_max_size = fallback_max_size
+        self.precision = precision
         self.session = None
+        self.background_cache = BackgroundCache()
+        self.last_info = None
+        self._cost_scale = {}
+        self._cost_lock = threading.Lock()
+        self._skipped = 0
+        # Activo mientras una inferencia del modelo principal sigue en curso,
+        # también si ya superó el límite y su resultado se descarta
+        self._primary_busy = threading.Event()
+        self.fallback_session = None
         
         # Configurar logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         
+        # INT8 es una petición explícita: si no se puede cumplir se falla en vez
+        # de degradar en silencio al método OpenCV
+        if precision == 'int8' and not REMBG_AVAILABLE:
+            raise RuntimeError("La precisión int8 requiere rembg y onnxruntime")
+        
         # Inicializar sesión de rembg si está disponible
         if REMBG_AVAILABLE:
             try:
-                self.session = new_session(model_name)
-                self.logger.info(f"Modelo {model_name} cargado exitosamente")
+                self.session = get_session(model_name, precision)
+                self.logger.info(f"Modelo {model_name} ({precision}) cargado exitosamente")
             except Exception as e:
+                if precision == 'int8':
+                    raise RuntimeError(f"No se pudo cargar el modelo {model_name} en int8: {e}") from e
                 self.logger.error(f"Error cargando modelo {model_name}: {e}")
                 self.session = None
+            
+            # Con límite de tiempo el modelo rápido se carga ya: cargarlo (o
+            # cuantizarlo) en la primera imagen lenta se comería el límite
+            if deadline is not None and fallback_model != model_name:
+                try:
+                    self.fallback_session = get_session(fallback_model, precision)
+                    self.logger.info(f"Modelo rápido {fallback_model} ({precision}) cargado exitosamente")
+                except Exception as e:
+                    if precision == 'int8':
+                        raise RuntimeError(
+                            f"No se pudo cargar el modelo {fallback_model} en int8: {e}") from e
+                    self.logger.error(f"Error cargando modelo {fallback_model}: {e}")
         else:
             self.logger.warning("rembg no disponible, usando método alternativo")
     
-    def _remove_background_rembg(self, image: Image.Image) -> Image.Image:
+    def _remove_background_rembg(self, image: Image.Image, session=None) -> Image.Image:
         """
         Remueve el fondo usando rembg.
         
         Args:
             image (PIL.Image): Imagen de entrada
+            session: Sesión de rembg a usar (por defecto la del modelo principal)
             
         Returns:
             PIL.Image: Imagen sin fondo (con canal alpha)
         """
-        if not REMBG_AVAILABLE or self.session is None:
+        session = session or self.session
+        if not REMBG_AVAILABLE or session is None:
             raise RuntimeError("rembg no está disponible o no se pudo cargar el modelo")
         
         # Convertir a RGB si es necesario
@@ -92,7 +216,7 @@ class BackgroundRemover:
             image = image.convert('RGB')
         
         # Remover fondo
-        result = remove(image, session=self.session)
+        result = remove(image, session=session)
         
         return result
     
@@ -139,15 +263,135 @@ class BackgroundRemover:
         
         return result_rgba
     
-    def remove_background(self, image: Union[str, Image.Image, np.ndarray]) -> Image.Image:
+    def _refine_edges(self, original: Image.Image, no_bg: Image.Image) -> Image.Image:
         """
-        Remueve el fondo de una imagen.
+        Refina el alpha solo en una banda estrecha alrededor del borde de la máscara.
+        
+        Args:
+            original (PIL.Image): Imagen de entrada
+            no_bg (PIL.Image): Resultado de la segmentación con canal alpha
+            
+        Returns:
+            PIL.Image: Imagen RGBA con el alpha refinado, los colores originales
+            fuera de la banda y el color del objeto estimado dentro de ella
+        """
+        rgb = original.convert('RGB')
+        if rgb.size != no_bg.size:
+            rgb = rgb.resize(no_bg.size, Image.Resampling.LANCZOS)
+        
+        # Los colores parten de la original: la segmentación pone a negro el
+        # fondo y la banda refinada puede ganar opacidad en esos píxeles. En la
+        # banda se sustituyen por el color del objeto para evitar el halo
+        alpha = pil_to_numpy(no_bg.getchannel('A'))
+        refined, foreground = refine_alpha_band(pil_to_numpy(rgb), alpha, band=self.edge_band)
+        
+        result = numpy_to_pil(foreground).convert('RGBA')
+        result.putalpha(numpy_to_pil(refined))
+        return result
+    
+    def _base_cost(self, model_name: str, size: Tuple[int, int]) -> float:
+        """Coste de referencia (sin calibrar) de un modelo para un tamaño de imagen."""
+        fixed, per_megapixel = self.MODEL_COST.get(model_name, self.MODEL_COST['u2net'])
+        return fixed + per_megapixel * size[0] * size[1] / 1e6
+    
+    def predict_cost(self, model_name: str, size: Tuple[int, int]) -> Optional[float]:
+        """
+        Predice el tiempo de segmentación de una imagen según su tamaño.
+        
+        Args:
+            model_name (str): Nombre del modelo
+            size (Tuple[int, int]): Tamaño (ancho, alto) de la imagen
+            
+        Returns:
+            float: Tiempo estimado en segundos, o None si el modelo aún no se ha
+            ejecutado en este equipo
+        """
+        scale = self._cost_scale.get(model_name)
+        if scale is None:
+            return None
+        return scale * self._base_cost(model_name, size)
+    
+    def _observe_cost(self, model_name: str, size: Tuple[int, int], elapsed: float) -> None:
+        """Calibra la predicción de coste del modelo con un tiempo real completo."""
+        ratio = elapsed / self._base_cost(model_name, size)
+        with self._cost_lock:
+            scale = self._cost_scale.get(model_name)
+            # La primera observación fija la escala; las siguientes la suavizan
+            self._cost_scale[model_name] = ratio if scale is None else 0.8 * scale + 0.2 * ratio
+    
+    def _segment_timed(self, image: Image.Image) -> Image.Image:
+        """
+        Segmenta con el modelo principal y registra el tiempo real empleado.
+        
+        El tiempo se registra aunque nadie espere ya el resultado (inferencia
+        que superó el límite), así una ejecución lenta corrige la predicción
+        con su duración real en vez de con el límite.
+        """
+        start = time.perf_counter()
+        try:
+            result = self._segment(image)
+            self._observe_cost(self.model_name, image.size, time.perf_counter() - start)
+            return result
+        finally:
+            self._primary_busy.clear()
+    
+    def _segment(self, image: Image.Image) -> Image.Image:
+        """Segmenta con el modelo principal (o con OpenCV si rembg no está disponible)."""
+        if REMBG_AVAILABLE and self.session is not None:
+            return self._remove_background_rembg(image)
+        self.logger.info("Usando método OpenCV alternativo")
+        return self._remove_background_opencv(image)
+    
+    def _fallback(self):
+        """Sesión del modelo rápido (None si no se pudo cargar: se usa OpenCV)."""
+        return self.session if self.fallback_model == self.model_name else self.fallback_session
+    
+    def _remove_background_fast(self, image: Image.Image) -> Image.Image:
+        """
+        Segmentación rápida: modelo ligero sobre la imagen reducida.
+        
+        La máscara se escala de vuelta al tamaño original y se aplica sobre
+        los colores originales.
+        
+        Args:
+            image (PIL.Image): Imagen de entrada
+            
+        Returns:
+            PIL.Image: Imagen sin fondo con canal alpha, del tamaño original
+        """
+        small = resize_image(image, self.fallback_max_size)
+        session = self._fallback()
+        
+        if session is not None:
+            cutout = self._remove_background_rembg(small, session)
+        else:
+            cutout = self._remove_background_opencv(small)
+        
+        alpha = cutout.getchannel('A')
+        if alpha.size != image.size:
+            alpha = alpha.resize(image.size, Image.Resampling.BILINEAR)
+        
+        result = image.convert('RGBA')
+        result.putalpha(alpha)
+        return result
+    
+    def remove_background_with_info(self, image: Union[str, Image.Image, np.ndarray]
+                                     ) -> Tuple[Image.Image, dict]:
+        """
+        Remueve el fondo de una imagen e informa de cómo se obtuvo el resultado.
+        
+        Con un límite de tiempo (deadline), si el coste predicho del modelo
+        principal lo supera o la inferencia no termina a tiempo, se usa el
+        modelo rápido sobre la imagen reducida.
         
         Args:
             image: Imagen de entrada (ruta, PIL Image, o numpy array)
             
         Returns:
-            PIL.Image: Imagen sin fondo con canal alpha
+            Tuple[PIL.Image, dict]: Imagen sin fondo con canal alpha e información
+            del procesamiento: path ('primary', 'opencv', 'fallback' o
+            'passthrough'), model, elapsed (s), predicted (s), reason, error y
+            refine_error (si falló el refinamiento de bordes)
         """
         # Convertir entrada a PIL Image
         if isinstance(image, str):
@@ -161,46 +405,137 @@ class BackgroundRemover:
         else:
             raise TypeError("Tipo de imagen no soportado")
         
-        # Intentar usar rembg primero
+        start = time.perf_counter()
+        primary_path = 'primary' if REMBG_AVAILABLE and self.session is not None else 'opencv'
+        info = {'path': primary_path, 'deadline': self.deadline,
+                'model': self.model_name if primary_path == 'primary' else 'opencv'}
+        
         try:
-            if REMBG_AVAILABLE and self.session is not None:
-                return self._remove_background_rembg(pil_image)
+            if self.deadline is None:
+                result = self._segment(pil_image)
             else:
-                self.logger.info("Usando método OpenCV alternativo")
-                return self._remove_background_opencv(pil_image)
+                predicted = self.predict_cost(self.model_name, pil_image.size)
+                info['predicted'] = round(predicted, 4) if predicted is not None else None
+                
+                # Solo se descarta el modelo principal por predicción tras haberlo
+                # medido en este equipo, y cada PROBE_INTERVAL imágenes se vuelve
+                # a probar para que la calibración pueda recuperarse
+                result = None
+                if self._primary_busy.is_set():
+                    # Una inferencia anterior que superó el límite sigue ocupando
+                    # la CPU: lanzar otra solo acumularía hilos huérfanos
+                    info['reason'] = 'busy'
+                elif (predicted is not None and predicted > self.deadline
+                        and self._skipped < self.PROBE_INTERVAL):
+                    info['reason'] = 'predicted-cost'
+                    self._skipped += 1
+                else:
+                    if self._skipped:
+                        # Reprueba: la escala anterior está obsoleta y la nueva
+                        # medida la sustituye en vez de promediarse con ella
+                        with self._cost_lock:
+                            self._cost_scale.pop(self.model_name, None)
+                        self._skipped = 0
+                    self._primary_busy.set()
+                    try:
+                        result = _run_with_timeout(lambda: self._segment_timed(pil_image),
+                                                   self.deadline)
+                    except TimeoutError:
+                        info['reason'] = 'timeout'
+                
+                if result is None:
+                    self.logger.warning(
+                        f"Límite de {self.deadline:.2f}s no alcanzable con {self.model_name} "
+                        f"({info['reason']}), usando {self.fallback_model} reducido")
+                    info['path'] = 'fallback'
+                    info['model'] = self.fallback_model if self._fallback() is not None else 'opencv'
+                    result = self._remove_background_fast(pil_image)
         except Exception as e:
             self.logger.error(f"Error removiendo fondo: {e}")
             # Fallback: retornar imagen original con alpha channel
             if pil_image.mode != 'RGBA':
                 pil_image = pil_image.convert('RGBA')
-            return pil_image
+            result = pil_image
+            info['path'] = 'passthrough'
+            info['error'] = str(e)
+        
+        # Un error al refinar no invalida la segmentación: se conserva sin refinar
+        if self.refine_edges and info['path'] != 'passthrough':
+            try:
+                self.logger.info("Refinando bordes...")
+                result = self._refine_edges(pil_image, result)
+            except Exception as e:
+                self.logger.warning(f"Error refinando bordes, se usa la máscara sin refinar: {e}")
+                info['refine_error'] = str(e)
+        
+        info['elapsed'] = round(time.perf_counter() - start, 4)
+        self.last_info = info
+        return result, info
     
-    def apply_white_background(self, image: Image.Image) -> Image.Image:
+    def remove_background(self, image: Union[str, Image.Image, np.ndarray]) -> Image.Image:
         """
-        Aplica un fondo blanco a una imagen con canal alpha.
+        Remueve el fondo de una imagen.
+        
+        La información del procesamiento queda disponible en last_info.
+        
+        Args:
+            image: Imagen de entrada (ruta, PIL Image, o numpy array)
+            
+        Returns:
+            PIL.Image: Imagen sin fondo con canal alpha
+        """
+        result, _ = self.remove_background_with_info(image)
+        return result
+    
+    def apply_background(self, image: Image.Image,
+                         color: Optional[Tuple[int, int, int]] = None,
+                         background_image: Optional[Union[str, Image.Image]] = None) -> Image.Image:
+        """
+        Aplica un fondo de color o de imagen a una imagen con canal alpha.
+        
+        Los fondos escalados se guardan en la caché del removedor, por lo que
+        componer muchas imágenes sobre el mismo fondo no repite el trabajo.
         
         Args:
             image (PIL.Image): Imagen con canal alpha
+            color: Color RGB del fondo (por defecto blanco)
+            background_image: Ruta o imagen PIL del fondo (tiene prioridad sobre color)
             
         Returns:
-            PIL.Image: Imagen con fondo blanco RGB(255,255,255)
+            PIL.Image: Imagen RGB con el fondo aplicado
         """
         if image.mode != 'RGBA':
             # Si no tiene canal alpha, asumir que ya tiene fondo
             return image.convert('RGB')
         
-        # Crear fondo blanco del mismo tamaño
-        white_bg = create_white_background(image.size, 'RGBA')
+        if background_image is not None:
+            background = self.background_cache.image(background_image, image.size, 'RGBA')
+        else:
+            background = self.background_cache.color(color or (255, 255, 255), image.size, 'RGBA')
         
-        # Combinar la imagen con el fondo blanco
-        result = Image.alpha_composite(white_bg, image)
+        # Combinar la imagen con el fondo (alpha_composite no modifica el fondo en caché)
+        result = Image.alpha_composite(background, image)
         
         # Convertir a RGB para eliminar el canal alpha
         return result.convert('RGB')
     
+    def apply_white_background(self, image: Image.Image) -> Image.Image:
+        """
+        Aplica un fondo blanco a una imagen con canal alpha.
+        
+        Args:
+            image (PIL.Image): Imagen con canal alpha
+            
+        Returns:
+            PIL.Image: Imagen con fondo blanco RGB(255,255,255)
+        """
+        return self.apply_background(image, color=(255, 255, 255))
+    
     def process_image(self, image: Union[str, Image.Image, np.ndarray], 
                      output_path: Optional[str] = None,
-                     resize_max: Optional[int] = None) -> Image.Image:
+                     resize_max: Optional[int] = None,
+                     background_color: Optional[Tuple[int, int, int]] = None,
+                     background_image: Optional[Union[str, Image.Image]] = None) -> Image.Image:
         """
         Procesa una imagen completa: remueve fondo y aplica fondo blanco.
         
@@ -208,9 +543,11 @@ class BackgroundRemover:
             image: Imagen de entrada
             output_path: Ruta para guardar el resultado (opcional)
             resize_max: Tamaño máximo para redimensionar (opcional)
+            background_color: Color RGB del fondo en lugar de blanco (opcional)
+            background_image: Ruta o imagen PIL del fondo (opcional)
             
         Returns:
-            PIL.Image: Imagen procesada con fondo blanco
+            PIL.Image: Imagen procesada con el fondo aplicado
         """
         self.logger.info("Iniciando procesamiento de imagen...")
         
@@ -230,9 +567,10 @@ class BackgroundRemover:
         self.logger.info("Removiendo fondo...")
         no_bg = self.remove_background(original)
         
-        # Aplicar fondo blanco
-        self.logger.info("Aplicando fondo blanco...")
-        result = self.apply_white_background(no_bg)
+        # Aplicar fondo (blanco por defecto)
+        self.logger.info("Aplicando fondo...")
+        result = self.apply_background(no_bg, color=background_color,
+                                       background_image=background_image)
         
         # Guardar si se especifica ruta de salida
         if output_path:
@@ -294,6 +632,10 @@ class BackgroundRemover:
             'rembg_available': REMBG_AVAILABLE,
             'session_loaded': self.session is not None,
             'gpu_enabled': self.enable_gpu,
+            'precision': self.precision,
+            'refine_edges': self.refine_edges,
+            'deadline': self.deadline,
+            'fallback_model': self.fallback_model,
             'available_models': self.AVAILABLE_MODELS
         }
     
@@ -0,0 +1,163 @@
+"""
+Easy Background - Refinamiento de bordes
+Alpha matting restringido a una banda estrecha alrededor del borde de la máscara
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import cv2
+
+
+TRIMAP_BACKGROUND = 0
+TRIMAP_UNKNOWN = 128
+TRIMAP_FOREGROUND = 255
+
+
+def build_trimap(alpha: np.ndarray, band: int = 8, threshold: int = 127) -> np.ndarray:
+    """
+    Construye un trimap con una banda desconocida alrededor del borde de la máscara.
+
+    Args:
+        alpha (np.ndarray): Canal alpha (uint8, HxW)
+        band (int): Ancho de la banda desconocida a cada lado del borde (px)
+        threshold (int): Umbral para binarizar el alpha
+
+    Returns:
+        np.ndarray: Trimap uint8 con 0 (fondo), 128 (desconocido) y 255 (objeto)
+    """
+    binary = (alpha > threshold).astype(np.uint8)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * band + 1, 2 * band + 1))
+
+    foreground = cv2.erode(binary, kernel)
+    possible = cv2.dilate(binary, kernel)
+
+    trimap = np.full(alpha.shape, TRIMAP_UNKNOWN, dtype=np.uint8)
+    trimap[foreground == 1] = TRIMAP_FOREGROUND
+    trimap[possible == 0] = TRIMAP_BACKGROUND
+    return trimap
+
+
+def _estimate_tile(image: np.ndarray, trimap: np.ndarray, alpha: np.ndarray,
+                   radius: int, eps: float = 1e-6,
+                   confidence_scale: float = 0.01) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Estima el alpha de un tile proyectando cada color entre los colores locales
+    de objeto y fondo, calculados con filtros de caja (todo vectorizado).
+
+    El color del objeto se estima junto al alpha con la ecuación de composición
+    I = a*F + (1 - a)*B, sustituyendo en cada píxel la contribución del fondo
+    local por la del objeto: F = I + (1 - a) * (F_local - B_local). Así los
+    píxeles semitransparentes no arrastran el color del fondo original (halo).
+
+    Args:
+        image (np.ndarray): Tile RGB en float32 [0, 1] (HxWx3)
+        trimap (np.ndarray): Trimap del tile
+        alpha (np.ndarray): Alpha original del tile en float32 [0, 1]
+        radius (int): Radio de la ventana para estimar los colores locales
+        eps (float): Término de estabilidad numérica
+        confidence_scale (float): Distancia de color (al cuadrado) a partir de la
+            cual se confía en la estimación más que en el alpha original
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Alpha estimado en float32 [0, 1] (HxW) y
+        color del objeto en float32 [0, 1] (HxWx3)
+    """
+    ksize = (2 * radius + 1, 2 * radius + 1)
+    fg_mask = (trimap == TRIMAP_FOREGROUND).astype(np.float32)
+    bg_mask = (trimap == TRIMAP_BACKGROUND).astype(np.float32)
+
+    fg_weight = cv2.blur(fg_mask, ksize)
+    bg_weight = cv2.blur(bg_mask, ksize)
+    fg_color = cv2.blur(image * fg_mask[:, :, np.newaxis], ksize) / (fg_weight[:, :, np.newaxis] + eps)
+    bg_color = cv2.blur(image * bg_mask[:, :, np.newaxis], ksize) / (bg_weight[:, :, np.newaxis] + eps)
+
+    diff = fg_color - bg_color
+    denom = np.sum(diff * diff, axis=2)
+    estimate = np.clip(np.sum((image - bg_color) * diff, axis=2) / (denom + eps), 0.0, 1.0)
+
+    # Si objeto y fondo tienen colores parecidos la proyección no es fiable:
+    # mezclar con el alpha original según la separación de colores
+    confidence = denom / (denom + confidence_scale)
+    refined = confidence * estimate + (1.0 - confidence) * alpha
+
+    valid = (fg_weight > eps) & (bg_weight > eps)
+    alpha_out = np.where(valid, refined, alpha)
+
+    foreground = np.clip(image + (1.0 - alpha_out)[:, :, np.newaxis] * diff, 0.0, 1.0)
+    foreground = np.where(valid[:, :, np.newaxis], foreground, image)
+    return alpha_out, foreground
+
+
+def refine_alpha_band(image: np.ndarray, alpha: np.ndarray, band: int = 8,
+                      radius: Optional[int] = None, tile_size: int = 256,
+                      restrict: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Refina el alpha y el color del objeto solo dentro de la banda desconocida
+    alrededor del borde.
+
+    Las zonas de objeto y fondo conocidas no se modifican. El cálculo se hace
+    por tiles y se omiten los tiles que no tocan la banda, por lo que el coste
+    es proporcional al perímetro de la máscara y no al área de la imagen.
+
+    Args:
+        image (np.ndarray): Imagen RGB uint8 (HxWx3)
+        alpha (np.ndarray): Canal alpha uint8 (HxW)
+        band (int): Ancho de la banda desconocida a cada lado del borde (px)
+        radius (int): Radio de la ventana de colores locales (por defecto 2 * band)
+        tile_size (int): Tamaño de los tiles de procesamiento
+        restrict (bool): Si False se procesan todos los tiles (solo para medir
+            el coste equivalente sobre la imagen completa)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Alpha refinado uint8 (HxW) e imagen RGB
+        uint8 (HxWx3) con el color del objeto estimado en la banda
+    """
+    if image.shape[:2] != alpha.shape:
+        raise ValueError("La imagen y el alpha deben tener el mismo tamaño")
+
+    trimap = build_trimap(alpha, band)
+    unknown = trimap == TRIMAP_UNKNOWN
+    result = alpha.copy()
+    foreground = image.copy()
+    if not unknown.any():
+        return result, foreground
+
+    radius = radius or 2 * band
+    height, width = alpha.shape
+
+    if restrict:
+        ys, xs = np.nonzero(unknown)
+        top, bottom = int(ys.min()), int(ys.max()) + 1
+        left, right = int(xs.min()), int(xs.max()) + 1
+    else:
+        top, bottom, left, right = 0, height, 0, width
+
+    for y0 in range(top, bottom, tile_size):
+        y1 = min(y0 + tile_size, bottom)
+        for x0 in range(left, right, tile_size):
+            x1 = min(x0 + tile_size, right)
+
+            tile_unknown = unknown[y0:y1, x0:x1]
+            if restrict and not tile_unknown.any():
+                continue
+
+            # Ampliar el tile con el radio para que los filtros vean los vecinos
+            py0, py1 = max(0, y0 - radius), min(height, y1 + radius)
+            px0, px1 = max(0, x0 - radius), min(width, x1 + radius)
+
+            estimate, colors = _estimate_tile(
+                image[py0:py1, px0:px1].astype(np.float32) / 255.0,
+                trimap[py0:py1, px0:px1],
+                alpha[py0:py1, px0:px1].astype(np.float32) / 255.0,
+                radius
+            )
+            inner = estimate[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+            inner_colors = colors[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+
+            tile_result = result[y0:y1, x0:x1]
+            tile_result[tile_unknown] = np.round(inner[tile_unknown] * 255).astype(np.uint8)
+            tile_foreground = foreground[y0:y1, x0:x1]
+            tile_foreground[tile_unknown] = np.round(inner_colors[tile_unknown] * 255).astype(np.uint8)
+
+    return result, foreground
@@ -0,0 +1,327 @@
+"""
+Easy Background - Pipeline
+Motor único de procesamiento: una segmentación por imagen y varias salidas
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+try:
+    from .archives import load_image_bytes
+    from .utils import ensure_output_directory, numpy_to_pil, resize_image, validate_image_path
+except ImportError:
+    # Importación directa cuando se ejecuta como script
+    from archives import load_image_bytes
+    from utils import ensure_output_directory, numpy_to_pil, resize_image, validate_image_path
+
+
+OUTPUT_FORMATS = ('white-bg', 'transparent-png', 'mask', 'custom-bg')
+
+# Sufijo de nombre de archivo de cada formato cuando se generan varias salidas
+OUTPUT_SUFFIXES = {
+    'white-bg': '_processed',
+    'transparent-png': '_transparent',
+    'mask': '_mask',
+    'custom-bg': '_custom',
+}
+
+# Formatos que siempre se guardan como PNG (necesitan alpha o son máscaras)
+PNG_FORMATS = ('transparent-png', 'mask')
+
+
+def output_extension(output_format: str, source_ext: str) -> str:
+    """
+    Devuelve la extensión de salida de un formato.
+
+    Args:
+        output_format (str): Formato de salida
+        source_ext (str): Extensión del archivo de entrada
+
+    Returns:
+        str: Extensión de salida
+    """
+    return '.png' if output_format in PNG_FORMATS else source_ext
+
+
+def output_paths(base_path: str, output_formats: Sequence[str],
+                 explicit: bool = False) -> Dict[str, str]:
+    """
+    Genera las rutas de salida de cada formato a partir de una ruta base.
+
+    Con una ruta explícita y un único formato se respeta la ruta (ajustando la
+    extensión si el formato necesita PNG); en otro caso se añade el sufijo del
+    formato: foto.jpg -> foto_processed.jpg, foto_transparent.png, ...
+
+    Args:
+        base_path (str): Ruta de salida indicada o ruta de la imagen de entrada
+        output_formats: Formatos a generar
+        explicit (bool): Si base_path es una ruta de salida indicada por el usuario
+
+    Returns:
+        Dict[str, str]: Ruta de salida por formato
+    """
+    name, ext = os.path.splitext(base_path)
+    if explicit and len(output_formats) == 1:
+        output_format = output_formats[0]
+        return {output_format: f"{name}{output_extension(output_format, ext)}"}
+    return {
+        output_format: f"{name}{OUTPUT_SUFFIXES[output_format]}{output_extension(output_format, ext)}"
+        for output_format in output_formats
+    }
+
+
+def output_names(input_name: str, output_formats: Sequence[str],
+                 prefix: str = '') -> Dict[str, str]:
+    """
+    Genera los nombres de salida de una imagen de un lote, conservando su carpeta relativa.
+
+    Con varios formatos cada uno lleva su sufijo, salvo white-bg cuando hay
+    prefijo: el prefijo ya distingue la salida de la entrada (processed_foto.jpg,
+    processed_foto_mask.png en lugar de processed_foto_processed.jpg).
+
+    Args:
+        input_name (str): Nombre (o ruta relativa) de la imagen de entrada
+        output_formats: Formatos a generar
+        prefix (str): Prefijo para los archivos de salida
+
+    Returns:
+        Dict[str, str]: Nombre de salida por formato
+    """
+    directory, filename = os.path.split(input_name)
+    name, ext = os.path.splitext(filename)
+    if len(output_formats) == 1:
+        suffixes = {output_formats[0]: ''}
+    else:
+        suffixes = {output_format: '' if prefix and output_format == 'white-bg'
+                    else OUTPUT_SUFFIXES[output_format]
+                    for output_format in output_formats}
+    return {
+        output_format: os.path.join(
+            directory, f"{prefix}{name}{suffix}{output_extension(output_format, ext)}")
+        for output_format, suffix in suffixes.items()
+    }
+
+
+def save_image(image: Image.Image, path: str, quality: int = 95) -> str:
+    """
+    Guarda una imagen eligiendo el formato por la extensión.
+
+    Args:
+        image (PIL.Image): Imagen a guardar
+        path (str): Ruta de salida
+        quality (int): Calidad de compresión JPEG (1-100)
+
+    Returns:
+        str: Ruta guardada
+    """
+    ensure_output_directory(path)
+    if path.lower().endswith('.png'):
+        image.save(path, "PNG")
+    else:
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(path, quality=quality, optimize=True)
+    return path
+
+
+class DirectoryWriter:
+    """
+    Destino de salida en disco con la misma interfaz que ArchiveWriter.
+    """
+
+    def __init__(self, output_dir: str = ''):
+        """
+        Inicializa el destino.
+
+        Args:
+            output_dir (str): Directorio base (vacío para usar los nombres como rutas)
+        """
+        self.output_dir = output_dir
+        self.count = 0
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    def add_image(self, name: str, image: Image.Image, quality: int = 95) -> str:
+        """
+        Guarda una imagen dentro del directorio base.
+
+        Args:
+            name (str): Nombre o ruta relativa de salida
+            image (PIL.Image): Imagen a guardar
+            quality (int): Calidad de compresión JPEG (1-100)
+
+        Returns:
+            str: Ruta guardada
+        """
+        path = save_image(image, os.path.join(self.output_dir, name), quality=quality)
+        self.count += 1
+        return path
+
+    def close(self) -> None:
+        """No hay nada que cerrar en un directorio."""
+
+    def __enter__(self) -> 'DirectoryWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class Pipeline:
+    """
+    Motor de procesamiento de imágenes.
+
+    Cada imagen se carga, se redimensiona antes de la inferencia y se segmenta
+    una sola vez; a partir de esa segmentación se generan todas las salidas
+    pedidas (fondo blanco, PNG transparente, máscara y fondo personalizado).
+    """
+
+    def __init__(self, remover, output_formats: Sequence[str] = ('white-bg',),
+                 resize_max: Optional[int] = None, quality: int = 95,
+                 background: Optional[dict] = None):
+        """
+        Inicializa el pipeline.
+
+        Args:
+            remover (BackgroundRemover): Removedor ya inicializado
+            output_formats: Formatos de salida a generar
+            resize_max (int): Tamaño máximo para redimensionar (opcional)
+            quality (int): Calidad de compresión JPEG (1-100)
+            background (dict): background_color/background_image para custom-bg
+                (si se indica, white-bg se sustituye por custom-bg)
+        """
+        output_formats = list(dict.fromkeys(output_formats))
+        if not output_formats:
+            raise ValueError("Se necesita al menos un formato de salida")
+        for output_format in output_formats:
+            if output_format not in OUTPUT_FORMATS:
+                raise ValueError(f"Formato de salida no soportado: {output_format}")
+
+        self.logger = logging.getLogger(__name__)
+
+        # Con un fondo personalizado, el fondo blanco pasa a ser ese fondo; si
+        # ningún formato compone sobre un fondo, se avisa de que no se usará
+        background = background or {}
+        has_background = bool(background.get('background_color') or background.get('background_image'))
+        if 'custom-bg' in output_formats and not has_background:
+            raise ValueError("custom-bg requiere un color o una imagen de fondo")
+        if has_background and 'custom-bg' not in output_formats:
+            if 'white-bg' in output_formats:
+                output_formats = ['custom-bg' if output_format == 'white-bg' else output_format
+                                  for output_format in output_formats]
+            else:
+                self.logger.warning(
+                    f"El fondo personalizado no tiene efecto con los formatos "
+                    f"{', '.join(output_formats)}; añade custom-bg para usarlo")
+
+        self.remover = remover
+        self.output_formats = output_formats
+        self.resize_max = resize_max
+        self.quality = quality
+        self.background = background
+
+    def load(self, image: Union[str, bytes, Image.Image, np.ndarray]) -> Image.Image:
+        """
+        Carga la imagen de entrada y la redimensiona antes de la inferencia.
+
+        Args:
+            image: Imagen de entrada (ruta, bytes codificados, PIL Image, o numpy array)
+
+        Returns:
+            PIL.Image: Imagen lista para segmentar
+        """
+        if isinstance(image, str):
+            if not validate_image_path(image):
+                raise ValueError(f"Ruta de imagen inválida: {image}")
+            image = Image.open(image)
+        elif isinstance(image, bytes):
+            image = load_image_bytes(image)
+        elif isinstance(image, np.ndarray):
+            image = numpy_to_pil(image)
+        elif not isinstance(image, Image.Image):
+            raise TypeError("Tipo de imagen no soportado")
+
+        if self.resize_max:
+            image = resize_image(image, self.resize_max)
+        return image
+
+    def render(self, image: Union[str, bytes, Image.Image, np.ndarray]
+               ) -> Tuple[Dict[str, Image.Image], dict]:
+        """
+        Segmenta una imagen una vez y genera todas las salidas pedidas.
+
+        Args:
+            image: Imagen de entrada (ruta, bytes codificados, PIL Image, o numpy array)
+
+        Returns:
+            Tuple[Dict[str, PIL.Image], dict]: Imagen resultante por formato e
+            información de la segmentación (camino usado, modelo y tiempo)
+        """
+        no_bg, info = self.remover.remove_background_with_info(self.load(image))
+        if no_bg.mode != 'RGBA':
+            no_bg = no_bg.convert('RGBA')
+
+        outputs = {}
+        for output_format in self.output_formats:
+            if output_format == 'transparent-png':
+                outputs[output_format] = no_bg
+            elif output_format == 'mask':
+                outputs[output_format] = no_bg.getchannel('A')
+            elif output_format == 'custom-bg':
+                outputs[output_format] = self.remover.apply_background(
+                    no_bg,
+                    color=self.background.get('background_color'),
+                    background_image=self.background.get('background_image')
+                )
+            else:
+                outputs[output_format] = self.remover.apply_white_background(no_bg)
+        return outputs, info
+
+    def process(self, image: Union[str, bytes, Image.Image, np.ndarray],
+                names: Dict[str, str], writer) -> dict:
+        """
+        Procesa una imagen y escribe cada salida en el destino.
+
+        Args:
+            image: Imagen de entrada (ruta, bytes codificados, PIL Image, o numpy array)
+            names (Dict[str, str]): Nombre de salida por formato
+            writer: Destino con add_image (DirectoryWriter o ArchiveWriter)
+
+        Returns:
+            dict: Información de la segmentación
+        """
+        outputs, info = self.render(image)
+        for output_format, result in outputs.items():
+            writer.add_image(names[output_format], result, quality=self.quality)
+        return info
+
+    def run(self, items: Iterable, writer, prefix: str = '') -> Iterable:
+        """
+        Procesa una secuencia de imágenes con nombre hacia un destino.
+
+        Los errores de una imagen no detienen el lote: se devuelven junto al
+        nombre de la imagen para que el llamador decida cómo informarlos.
+
+        Args:
+            items: Pares (nombre, imagen) a procesar. Las imágenes se decodifican
+                dentro del tratamiento de cada una, así que un archivo corrupto
+                solo descarta esa imagen
+            writer: Destino con add_image (DirectoryWriter o ArchiveWriter)
+            prefix (str): Prefijo para los archivos de salida
+
+        Yields:
+            Tuple[str, Optional[Exception], Optional[dict]]: Nombre de la imagen,
+            error si lo hubo e información de la segmentación
+        """
+        for name, image in items:
+            try:
+                info = self.process(image, output_names(name, self.output_formats, prefix), writer)
+            except Exception as e:
+                self.logger.error(f"Error procesando {name}: {e}")
+                yield name, e, None
+            else:
+                yield name, None, info
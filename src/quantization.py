@@ -0,0 +1,263 @@
+"""
+Easy Background - Cuantización
+Copias INT8 (cuantización dinámica) de los modelos ONNX para inferencia en CPU
+"""
+
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+PRECISIONS = ('fp32', 'int8')
+
+logger = logging.getLogger(__name__)
+
+
+def _require_onnxruntime() -> None:
+    """Lanza un error claro si falta onnxruntime."""
+    if not ONNXRUNTIME_AVAILABLE:
+        raise RuntimeError("onnxruntime no está disponible. Instala con: pip install onnxruntime")
+
+
+def _session_class(model_name: str):
+    """Devuelve la clase de sesión de rembg de un modelo."""
+    from rembg.sessions import sessions_class
+
+    for session_class in sessions_class:
+        if session_class.name() == model_name:
+            return session_class
+    raise ValueError(f"Modelo desconocido: {model_name}")
+
+
+def model_path(model_name: str) -> str:
+    """
+    Devuelve la ruta del archivo ONNX fp32 de un modelo de rembg, descargándolo si hace falta.
+
+    Args:
+        model_name (str): Nombre del modelo
+
+    Returns:
+        str: Ruta al archivo .onnx
+    """
+    return str(_session_class(model_name).download_models())
+
+
+def quantized_model_path(fp32_path: str) -> str:
+    """
+    Devuelve la ruta de la copia INT8 de un modelo (junto al original).
+
+    Args:
+        fp32_path (str): Ruta al modelo fp32
+
+    Returns:
+        str: Ruta al modelo cuantizado (modelo.int8.onnx)
+    """
+    name, _ = os.path.splitext(fp32_path)
+    return f"{name}.int8.onnx"
+
+
+def quantize_model(input_path: str, output_path: Optional[str] = None,
+                   per_channel: bool = False, force: bool = False) -> str:
+    """
+    Genera una copia del modelo con pesos cuantizados dinámicamente a INT8.
+
+    Args:
+        input_path (str): Ruta al modelo ONNX fp32
+        output_path (str): Ruta de salida (por defecto modelo.int8.onnx)
+        per_channel (bool): Cuantizar por canal (más precisión, algo más lento)
+        force (bool): Regenerar aunque la copia ya exista
+
+    Returns:
+        str: Ruta al modelo cuantizado
+    """
+    output_path = output_path or quantized_model_path(input_path)
+    if not force and _is_loadable(output_path):
+        return output_path
+
+    # Importación diferida: onnxruntime.quantization carga onnx, que solo hace
+    # falta al generar la copia cuantizada
+    _require_onnxruntime()
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError:
+        raise RuntimeError("La cuantización requiere onnx. Instala con: pip install onnx")
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Se escribe en un temporal del mismo directorio y se mueve al final: una
+    # cuantización interrumpida o dos procesos a la vez nunca dejan a medias
+    # el archivo definitivo
+    fd, temp_path = tempfile.mkstemp(suffix='.onnx', dir=output_dir or None)
+    os.close(fd)
+    logger.info(f"Cuantizando {input_path} -> {output_path}")
+    try:
+        quantize_dynamic(input_path, temp_path, per_channel=per_channel,
+                         weight_type=QuantType.QUInt8)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return output_path
+
+
+def _is_loadable(path: str) -> bool:
+    """Comprueba que un modelo ONNX existe y onnxruntime puede abrirlo."""
+    if not os.path.exists(path):
+        return False
+    _require_onnxruntime()
+    try:
+        ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+    except Exception as e:
+        logger.warning(f"El modelo {path} no se puede abrir, se regenera: {e}")
+        return False
+    return True
+
+
+def load_quantized_session(model_name: str, providers: Optional[List[str]] = None):
+    """
+    Crea una sesión de rembg del modelo que ejecuta su copia INT8.
+
+    Se usa una subclase de la sesión de rembg del modelo (con su preprocesado
+    y postprocesado) cuyo download_models devuelve la copia INT8, así el
+    constructor normal de rembg solo carga el modelo cuantizado y nunca el fp32.
+
+    Args:
+        model_name (str): Nombre del modelo
+        providers (List[str]): Proveedores de onnxruntime (por defecto CPU)
+
+    Returns:
+        Sesión de rembg con el modelo cuantizado
+    """
+    _require_onnxruntime()
+    session_class = _session_class(model_name)
+    int8_path = quantize_model(str(session_class.download_models()))
+
+    # Mismas opciones que rembg.new_session
+    sess_opts = ort.SessionOptions()
+    if 'OMP_NUM_THREADS' in os.environ:
+        sess_opts.inter_op_num_threads = int(os.environ['OMP_NUM_THREADS'])
+        sess_opts.intra_op_num_threads = int(os.environ['OMP_NUM_THREADS'])
+
+    class QuantizedSession(session_class):
+        @classmethod
+        def download_models(cls, *args, **kwargs):
+            return int8_path
+
+    return QuantizedSession(model_name, sess_opts, providers or ['CPUExecutionProvider'])
+
+
+def sample_inputs(session, count: int = 4, size: int = 320, seed: int = 0) -> List[Dict[str, np.ndarray]]:
+    """
+    Genera entradas aleatorias con la forma de las entradas de un modelo.
+
+    Las dimensiones dinámicas se sustituyen por 1 (lote) o por size.
+
+    Args:
+        session (ort.InferenceSession): Sesión del modelo
+        count (int): Número de entradas
+        size (int): Tamaño para las dimensiones espaciales dinámicas
+        seed (int): Semilla aleatoria
+
+    Returns:
+        List[Dict[str, np.ndarray]]: Entradas listas para session.run
+    """
+    rng = np.random.default_rng(seed)
+    samples = []
+    for _ in range(count):
+        feed = {}
+        for model_input in session.get_inputs():
+            shape = [dim if isinstance(dim, int) and dim > 0 else (1 if i == 0 else size)
+                     for i, dim in enumerate(model_input.shape)]
+            feed[model_input.name] = rng.random(shape, dtype=np.float32)
+        samples.append(feed)
+    return samples
+
+
+def _mask(output: np.ndarray) -> np.ndarray:
+    """Normaliza la salida como rembg (min-max) y la binariza."""
+    output = output.astype(np.float32)
+    span = output.max() - output.min()
+    normalized = (output - output.min()) / span if span > 0 else np.zeros_like(output)
+    return normalized > 0.5
+
+
+def mask_iou(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Calcula la IoU entre dos máscaras binarias.
+
+    Args:
+        a (np.ndarray): Primera máscara
+        b (np.ndarray): Segunda máscara
+
+    Returns:
+        float: Intersección sobre unión (1.0 si ambas están vacías)
+    """
+    union = np.logical_or(a, b).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(a, b).sum() / union)
+
+
+def compare_models(fp32_path: str, int8_path: str,
+                   inputs: Optional[List[Dict[str, np.ndarray]]] = None,
+                   repeat: int = 3) -> dict:
+    """
+    Compara un modelo fp32 con su copia INT8: velocidad e IoU de las máscaras.
+
+    Funciona con cualquier modelo ONNX cuya primera salida sea un mapa de
+    segmentación, por lo que también sirve con un modelo local pequeño.
+
+    Args:
+        fp32_path (str): Ruta al modelo fp32
+        int8_path (str): Ruta al modelo INT8
+        inputs: Entradas de prueba (por defecto, aleatorias con sample_inputs)
+        repeat (int): Repeticiones por entrada (se toma el mejor tiempo)
+
+    Returns:
+        dict: fp32_ms, int8_ms (media por entrada), speedup, iou (media) y
+        tamaño en bytes de cada modelo
+    """
+    _require_onnxruntime()
+    providers = ['CPUExecutionProvider']
+    fp32 = ort.InferenceSession(fp32_path, providers=providers)
+    int8 = ort.InferenceSession(int8_path, providers=providers)
+    inputs = inputs or sample_inputs(fp32)
+
+    def measure(session, feed):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = session.run(None, feed)[0]
+            best = min(best, time.perf_counter() - start)
+        return best, output
+
+    fp32_times, int8_times, ious = [], [], []
+    for feed in inputs:
+        fp32_time, fp32_output = measure(fp32, feed)
+        int8_time, int8_output = measure(int8, feed)
+        fp32_times.append(fp32_time)
+        int8_times.append(int8_time)
+        ious.append(mask_iou(_mask(fp32_output), _mask(int8_output)))
+
+    fp32_ms = float(np.mean(fp32_times)) * 1000
+    int8_ms = float(np.mean(int8_times)) * 1000
+    return {
+        'fp32_ms': round(fp32_ms, 2),
+        'int8_ms': round(int8_ms, 2),
+        'speedup': round(fp32_ms / int8_ms, 2) if int8_ms > 0 else None,
+        'iou': round(float(np.mean(ious)), 4),
+        'fp32_size': os.path.getsize(fp32_path),
+        'int8_size': os.path.getsize(int8_path),
+    }
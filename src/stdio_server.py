@@ -0,0 +1,235 @@
+"""
+Easy Background - Servidor stdin/stdout
+Modo co-proceso persistente: carga el modelo una vez y atiende peticiones NDJSON
+"""
+
+import base64
+import contextlib
+import json
+import logging
+import sys
+import time
+from typing import IO, Optional, Sequence
+
+from PIL import Image
+
+try:
+    from .archives import encode_image, load_image_bytes
+    from .pipeline import Pipeline, DirectoryWriter, output_extension, output_paths
+    from .utils import validate_image_path, parse_color
+except ImportError:
+    # Importación directa cuando se ejecuta como script
+    from archives import encode_image, load_image_bytes
+    from pipeline import Pipeline, DirectoryWriter, output_extension, output_paths
+    from utils import validate_image_path, parse_color
+
+
+class StdioServer:
+    """
+    Servidor de peticiones sobre stdin/stdout.
+
+    Cada línea de entrada es un objeto JSON con la petición y cada línea de
+    salida es un objeto JSON con la respuesta, en el mismo orden:
+
+        Petición:  {"id": 1, "input": "foto.jpg", "output": "foto.png",
+                    "output_format": "transparent-png", "resize": 1024}
+                   {"id": 2, "data": "<imagen en base64>", "quality": 90}
+        Respuesta: {"id": 1, "ok": true, "output": "foto.png",
+                    "path": "primary", "model": "u2net",
+                    "timings": {"decode_ms": ..., "inference_ms": ...,
+                                "process_ms": ..., "encode_ms": ...,
+                                "total_ms": ...}}
+                   {"id": 2, "ok": true, "data": "<resultado en base64>",
+                    "format": "JPEG", "timings": {...}}
+                   {"id": 3, "ok": false, "error": "..."}
+
+    "path" indica cómo se obtuvo la segmentación: 'primary', 'opencv',
+    'fallback' (límite de tiempo no alcanzable; incluye "reason") o
+    'passthrough' (error en la segmentación). Con 'passthrough' la respuesta
+    lleva "ok": false y "error", aunque incluye la salida generada con la
+    imagen original sin quitar el fondo.
+
+    Si no se indica "output" el resultado se devuelve en "data" (base64). Las
+    peticiones custom-bg aceptan "background_color" y "background_image"; los
+    fondos escalados se reutilizan entre peticiones gracias a la caché del
+    removedor.
+
+    "output_format" también admite una lista de formatos: la imagen se segmenta
+    una sola vez y la respuesta incluye "outputs" con la salida de cada formato
+    ({"white-bg": {"output": ...}, "mask": {"data": ..., "format": "PNG"}}).
+    """
+
+    def __init__(self, remover, default_formats: Sequence[str] = ('white-bg',),
+                 default_resize: Optional[int] = None, default_quality: int = 95,
+                 default_background: Optional[dict] = None):
+        """
+        Inicializa el servidor.
+
+        Args:
+            remover (BackgroundRemover): Removedor ya inicializado (modelo cargado)
+            default_formats: Formatos de salida si la petición no los indica
+            default_resize (int): Tamaño máximo por defecto (opcional)
+            default_quality (int): Calidad JPEG por defecto (1-100)
+            default_background (dict): background_color/background_image por defecto
+        """
+        self.remover = remover
+        self.default_formats = list(default_formats)
+        self.default_resize = default_resize
+        self.default_quality = default_quality
+        self.default_background = default_background or {}
+        self.logger = logging.getLogger(__name__)
+
+    def _load_input(self, request: dict) -> Image.Image:
+        """Carga la imagen de la petición desde una ruta o desde bytes en base64."""
+        if request.get('input'):
+            path = request['input']
+            if not validate_image_path(path):
+                raise ValueError(f"Ruta de imagen inválida: {path}")
+            image = Image.open(path)
+            image.load()
+            return image
+        if request.get('data'):
+            return load_image_bytes(base64.b64decode(request['data']))
+        raise ValueError("La petición debe incluir 'input' o 'data'")
+
+    def _background(self, request: dict) -> dict:
+        """Obtiene el fondo personalizado de la petición o el fondo por defecto."""
+        if 'background_color' not in request and 'background_image' not in request:
+            return self.default_background
+        color = request.get('background_color')
+        if isinstance(color, str):
+            color = parse_color(color)
+        elif color is not None:
+            color = tuple(color)
+        return {'background_color': color, 'background_image': request.get('background_image')}
+
+    def handle_request(self, request: dict) -> dict:
+        """
+        Procesa una petición y construye la respuesta.
+
+        Args:
+            request (dict): Petición decodificada
+
+        Returns:
+            dict: Respuesta con la salida, los tiempos o el error
+        """
+        response = {'id': request.get('id')}
+        start = time.perf_counter()
+
+        try:
+            output_formats = request.get('output_format', self.default_formats)
+            if isinstance(output_formats, str):
+                output_formats = [output_formats]
+            resize = request.get('resize', self.default_resize)
+            if resize is not None:
+                resize = int(resize)
+                if resize <= 0:
+                    raise ValueError(f"resize debe ser mayor que 0: {resize}")
+            quality = int(request.get('quality', self.default_quality))
+            if not 1 <= quality <= 100:
+                raise ValueError(f"quality debe estar entre 1 y 100: {quality}")
+            pipeline = Pipeline(
+                self.remover, output_formats,
+                resize_max=resize,
+                quality=quality,
+                background=self._background(request)
+            )
+
+            image = self._load_input(request)
+            decoded = time.perf_counter()
+
+            outputs, info = pipeline.render(image)
+            processed = time.perf_counter()
+
+            results = {}
+            output_path = request.get('output')
+            if output_path:
+                paths = output_paths(output_path, pipeline.output_formats, explicit=True)
+                writer = DirectoryWriter()
+                for output_format, result in outputs.items():
+                    results[output_format] = {
+                        'output': writer.add_image(paths[output_format], result,
+                                                   quality=pipeline.quality)
+                    }
+            else:
+                for output_format, result in outputs.items():
+                    filename = 'result' + output_extension(output_format, '.jpg')
+                    data = encode_image(result, filename, quality=pipeline.quality)
+                    results[output_format] = {
+                        'data': base64.b64encode(data).decode('ascii'),
+                        'format': 'PNG' if filename.endswith('.png') else 'JPEG',
+                    }
+            encoded = time.perf_counter()
+
+            # Un solo formato: la salida va directamente en la respuesta
+            if len(results) == 1:
+                response.update(next(iter(results.values())))
+            else:
+                response['outputs'] = results
+
+            # passthrough: la segmentación falló y la salida es la imagen original
+            response['ok'] = info['path'] != 'passthrough'
+            response['path'] = info['path']
+            response['model'] = info['model']
+            if 'reason' in info:
+                response['reason'] = info['reason']
+            if 'error' in info:
+                response['error'] = info['error']
+            if 'refine_error' in info:
+                response['refine_error'] = info['refine_error']
+            response['timings'] = {
+                'decode_ms': round((decoded - start) * 1000, 2),
+                'inference_ms': round(info['elapsed'] * 1000, 2),
+                'process_ms': round((processed - decoded) * 1000, 2),
+                'encode_ms': round((encoded - processed) * 1000, 2),
+                'total_ms': round((encoded - start) * 1000, 2),
+            }
+
+        except Exception as e:
+            self.logger.error(f"Error procesando petición {response['id']}: {e}")
+            response['ok'] = False
+            response['error'] = str(e)
+
+        return response
+
+    def serve(self, stdin: Optional[IO[str]] = None,
+              stdout: Optional[IO[str]] = None) -> int:
+        """
+        Atiende peticiones hasta que se cierra la entrada.
+
+        Cualquier salida accidental a stdout durante el servicio (prints de
+        librerías) se redirige a stderr para no corromper el protocolo. La carga
+        del removedor ocurre antes: el llamador debe construirlo también con
+        stdout redirigido (ver main.py).
+
+        Args:
+            stdin: Flujo de entrada de peticiones (por defecto sys.stdin)
+            stdout: Flujo de salida de respuestas (por defecto sys.stdout)
+
+        Returns:
+            int: Número de peticiones atendidas
+        """
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        handled = 0
+
+        with contextlib.redirect_stdout(sys.stderr):
+            for line in stdin:
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("La petición debe ser un objeto JSON")
+                except ValueError as e:
+                    response = {'id': None, 'ok': False, 'error': f"Petición inválida: {e}"}
+                else:
+                    response = self.handle_request(request)
+
+                stdout.write(json.dumps(response) + '\n')
+                stdout.flush()
+                handled += 1
+
+        return handled
@@ -3,10 +3,11 @@ Utilidades para Easy Background
 """
 
 import os
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Union, Tuple
+from typing import Callable, Hashable, List, Optional, Union, Tuple
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageColor
 
 
 def validate_image_path(image_path: str) -> bool:
@@ -99,6 +100,152 @@ def create_white_background(size: Tuple[int, int], mode: str = 'RGB') -> Image.I
         return Image.new('RGB', size, (255, 255, 255))
 
 
+def parse_color(value: str) -> Tuple[int, int, int]:
+    """
+    Convierte una cadena de color en una tupla RGB.
+    
+    Args:
+        value (str): Color como nombre ('white'), hexadecimal ('#f0f0f0')
+            o componentes separados por comas ('240,240,240')
+        
+    Returns:
+        Tuple[int, int, int]: Color RGB
+    """
+    if ',' in value:
+        parts = [int(part) for part in value.split(',')]
+        if len(parts) != 3 or not all(0 <= part <= 255 for part in parts):
+            raise ValueError(f"Color inválido: {value}")
+        return tuple(parts)
+    return ImageColor.getrgb(value)[:3]
+
+
+class BackgroundCache:
+    """
+    Caché LRU de fondos ya escalados y convertidos.
+    
+    Las entradas se indexan por (id del fondo, tamaño, modo), de modo que al
+    componer muchas imágenes sobre el mismo fondo solo se escala y convierte
+    una vez por tamaño. Las imágenes devueltas se comparten entre llamadas y
+    no deben modificarse en el sitio.
+    
+    El límite es de memoria (ancho * alto * bytes por píxel de cada entrada) y
+    no de número de entradas: unos pocos fondos de 8K ya ocupan cientos de MB.
+    """
+    
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Inicializa la caché.
+        
+        Args:
+            max_bytes (int): Memoria máxima ocupada por los fondos almacenados
+        """
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _image_bytes(image: Image.Image) -> int:
+        """Memoria aproximada de una imagen decodificada."""
+        return image.width * image.height * len(image.getbands())
+    
+    def get(self, key: Hashable, factory: Callable[[], Image.Image]) -> Image.Image:
+        """
+        Devuelve la entrada de la caché o la crea con factory si no existe.
+        
+        Args:
+            key: Clave de la entrada
+            factory: Función que genera la imagen si no está en caché
+            
+        Returns:
+            PIL.Image: Imagen almacenada
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        
+        self.misses += 1
+        value = factory()
+        value_bytes = self._image_bytes(value)
+        if value_bytes > self.max_bytes:
+            # No cabe ni sola: se devuelve sin desalojar el resto
+            return value
+        
+        self._entries[key] = value
+        self.size_bytes += value_bytes
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= self._image_bytes(evicted)
+        return value
+    
+    def color(self, color: Tuple[int, int, int], size: Tuple[int, int],
+              mode: str = 'RGBA') -> Image.Image:
+        """
+        Devuelve un lienzo de color sólido del tamaño y modo indicados.
+        
+        El lienzo se reutiliza tal cual entre imágenes del mismo tamaño: quien
+        lo use no debe modificarlo (Image.alpha_composite no lo hace).
+        
+        Args:
+            color (Tuple[int, int, int]): Color RGB
+            size (Tuple[int, int]): Tamaño (ancho, alto)
+            mode (str): Modo de color ('RGB', 'RGBA')
+            
+        Returns:
+            PIL.Image: Lienzo de color
+        """
+        fill = tuple(color) + (255,) if mode == 'RGBA' else tuple(color)
+        return self.get(('color', tuple(color), size, mode),
+                        lambda: Image.new(mode, size, fill))
+    
+    def image(self, background: Union[str, Image.Image], size: Tuple[int, int],
+              mode: str = 'RGBA', background_id: Optional[Hashable] = None) -> Image.Image:
+        """
+        Devuelve un fondo de imagen escalado y convertido.
+        
+        Args:
+            background: Ruta o imagen PIL del fondo
+            size (Tuple[int, int]): Tamaño (ancho, alto) de destino
+            mode (str): Modo de color de destino
+            background_id: Identificador del fondo (por defecto, su ruta). Las
+                imágenes PIL sin identificador no se guardan en caché
+            
+        Returns:
+            PIL.Image: Fondo escalado
+        """
+        if background_id is None and isinstance(background, str):
+            background_id = os.path.abspath(background)
+        
+        def load_source() -> Image.Image:
+            if isinstance(background, str):
+                with Image.open(background) as source:
+                    return source.convert(mode)
+            return background if background.mode == mode else background.convert(mode)
+        
+        def scale() -> Image.Image:
+            if background_id is None:
+                source = load_source()
+            else:
+                source = self.get(('source', background_id, mode), load_source)
+            if source.size == size:
+                return source
+            return source.resize(size, Image.Resampling.LANCZOS)
+        
+        if background_id is None:
+            return scale()
+        return self.get(('image', background_id, size, mode), scale)
+    
+    def clear(self) -> None:
+        """Vacía la caché."""
+        self._entries.clear()
+        self.size_bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 def resize_image(image: Image.Image, max_size: int = 1024) -> Image.Image:
     """
     Redimensiona una imagen manteniendo la proporción si excede el tamaño máximo.
@@ -126,7 +273,8 @@ def resize_image(image: Image.Image, max_size: int = 1024) -> Image.Image:
 
 
 def blend_images(foreground: Image.Image, background: Image.Image, 
-                 mask: Image.Image) -> Image.Image:
+                 mask: Image.Image, cache: Optional[BackgroundCache] = None,
+                 background_id: Optional[Hashable] = None) -> Image.Image:
     """
     Combina una imagen de primer plano con un fondo usando una máscara.
     
@@ -134,6 +282,8 @@ def blend_images(foreground: Image.Image, background: Image.Image,
         foreground (PIL.Image): Imagen de primer plano
         background (PIL.Image): Imagen de fondo
         mask (PIL.Image): Máscara de transparencia
+        cache (BackgroundCache): Caché de fondos escalados (opcional)
+        background_id: Identificador del fondo en la caché (opcional)
         
     Returns:
         PIL.Image: Imagen combinada
@@ -141,14 +291,20 @@ def blend_images(foreground: Image.Image, background: Image.Image,
     # Convertir todas las imágenes al mismo modo
     if foreground.mode != 'RGBA':
         foreground = foreground.convert('RGBA')
-    if background.mode != 'RGBA':
-        background = background.convert('RGBA')
     if mask.mode != 'L':
         mask = mask.convert('L')
     
-    # Redimensionar fondo si es necesario
-    if background.size != foreground.size:
-        background = background.resize(foreground.size, Image.Resampling.LANCZOS)
+    if cache is not None and background_id is not None:
+        # Reutilizar el fondo ya escalado y convertido
+        background = cache.image(background, foreground.size, 'RGBA',
+                                 background_id=background_id)
+    else:
+        if background.mode != 'RGBA':
+            background = background.convert('RGBA')
+        
+        # Redimensionar fondo si es necesario
+        if background.size != foreground.size:
+            background = background.resize(foreground.size, Image.Resampling.LANCZOS)
     
     # Usar la máscara para combinar las imágenes
     result = Image.composite(foreground, background, mask)
@@ -0,0 +1,91 @@
+"""
+Tests de ida y vuelta de archivos comprimidos a través del pipeline
+"""
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+from PIL import Image
+
+from src.archives import ArchiveWriter, iter_archive_images
+from src.pipeline import Pipeline
+
+
+class StubRemover:
+    """Removedor mínimo: deja la imagen opaca, sin cargar ningún modelo."""
+
+    def remove_background_with_info(self, image):
+        return image.convert('RGBA'), {'path': 'primary', 'model': 'stub', 'elapsed': 0.0}
+
+    def apply_white_background(self, image):
+        return image.convert('RGB')
+
+
+def _encode(image_format):
+    buffer = io.BytesIO()
+    Image.new('RGB', (16, 12), (200, 30, 30)).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+# Incluye un nombre que intenta salir del directorio, un miembro corrupto y
+# un archivo que no es imagen
+MEMBERS = {
+    'fotos/a.jpg': _encode('JPEG'),
+    '../fuera.png': _encode('PNG'),
+    'rota.jpg': b'esto no es una imagen',
+    'notas.txt': b'se ignora',
+}
+
+
+def _build_archive(path):
+    data = io.BytesIO()
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(data, 'w') as archive:
+            for name, content in MEMBERS.items():
+                archive.writestr(name, content)
+    else:
+        with tarfile.open(fileobj=data, mode='w:gz') as archive:
+            for name, content in MEMBERS.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content))
+    with open(path, 'wb') as handle:
+        handle.write(data.getvalue())
+
+
+def _read_archive(path):
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+    with tarfile.open(path) as archive:
+        return {member.name: archive.extractfile(member).read() for member in archive.getmembers()}
+
+
+@pytest.mark.parametrize('extension', ['.tar.gz', '.zip'])
+def test_archive_round_trip(tmp_path, extension):
+    source = str(tmp_path / f'entrada{extension}')
+    target = str(tmp_path / f'salida{extension}')
+    _build_archive(source)
+
+    pipeline = Pipeline(StubRemover(), ['white-bg', 'mask'])
+    with ArchiveWriter(target) as writer:
+        results = list(pipeline.run(iter_archive_images(source), writer))
+
+    # El miembro corrupto se descarta sin detener el lote; el .txt ni se lee
+    errors = {name for name, error, _ in results if error is not None}
+    assert errors == {'rota.jpg'}
+    assert len(results) == 3
+
+    outputs = _read_archive(target)
+    assert set(outputs) == {
+        'fotos/a_processed.jpg', 'fotos/a_mask.png',
+        'fuera_processed.png', 'fuera_mask.png',
+    }
+    expected_formats = {'.jpg': 'JPEG', '.png': 'PNG'}
+    for name, content in outputs.items():
+        image = Image.open(io.BytesIO(content))
+        assert image.format == expected_formats[name[name.rindex('.'):]]
+        assert image.size == (16, 12)
+    assert Image.open(io.BytesIO(outputs['fotos/a_mask.png'])).mode == 'L'
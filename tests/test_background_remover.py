@@ -0,0 +1,105 @@
+"""
+Tests del límite de tiempo por imagen con una segmentación simulada (sin modelos)
+"""
+
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+import src.background_remover as background_remover
+from src.background_remover import BackgroundRemover
+
+
+@pytest.fixture
+def remover(monkeypatch):
+    """Removedor con límite de 50 ms cuya segmentación se controla desde el test."""
+    monkeypatch.setattr(background_remover, 'REMBG_AVAILABLE', False)
+    remover = BackgroundRemover(deadline=0.05)
+    remover.release = threading.Event()
+    remover.release.set()
+    remover.calls = 0
+
+    def segment(image):
+        remover.calls += 1
+        # Bloquea hasta que el test lo libere (simula una inferencia lenta)
+        remover.release.wait(timeout=5)
+        return image.convert('RGBA')
+
+    remover._segment = segment
+    remover._remove_background_opencv = lambda image: image.convert('RGBA')
+    yield remover
+    remover.release.set()
+
+
+def _image():
+    return Image.new('RGB', (64, 48), (10, 200, 30))
+
+
+def _wait_idle(remover):
+    """Espera a que termine la inferencia huérfana en curso."""
+    for _ in range(500):
+        if not remover._primary_busy.is_set():
+            return
+        time.sleep(0.01)
+    raise AssertionError("La inferencia huérfana no terminó")
+
+
+def test_timeout_falls_back(remover):
+    remover.release.clear()
+
+    result, info = remover.remove_background_with_info(_image())
+
+    assert info['path'] == 'fallback'
+    assert info['reason'] == 'timeout'
+    assert result.size == (64, 48)
+
+
+def test_busy_while_orphaned_run_in_flight(remover):
+    remover.release.clear()
+    remover.remove_background_with_info(_image())
+
+    _, info = remover.remove_background_with_info(_image())
+
+    assert info['path'] == 'fallback'
+    assert info['reason'] == 'busy'
+    # No se lanzó una segunda inferencia del modelo principal
+    assert remover.calls == 1
+
+
+def test_predicted_cost_skips_then_reprobes(remover):
+    remover.PROBE_INTERVAL = 3
+    # Primera imagen lenta: supera el límite y su tiempo real calibra la escala
+    remover.release.clear()
+    remover.remove_background_with_info(_image())
+    time.sleep(0.1)
+    remover.release.set()
+    _wait_idle(remover)
+    assert remover.predict_cost(remover.model_name, (64, 48)) > remover.deadline
+
+    for _ in range(remover.PROBE_INTERVAL):
+        _, info = remover.remove_background_with_info(_image())
+        assert info['path'] == 'fallback'
+        assert info['reason'] == 'predicted-cost'
+    assert remover.calls == 1
+
+    # Tras PROBE_INTERVAL saltos se vuelve a probar el modelo principal
+    _, info = remover.remove_background_with_info(_image())
+    assert remover.calls == 2
+    assert info['path'] != 'fallback'
+    assert 'reason' not in info
+    assert remover.predict_cost(remover.model_name, (64, 48)) < remover.deadline
+
+
+def test_segmentation_error_passes_through(remover):
+    def fail(image):
+        raise RuntimeError("fallo simulado")
+
+    remover._segment = fail
+
+    result, info = remover.remove_background_with_info(_image())
+
+    assert info['path'] == 'passthrough'
+    assert info['error'] == "fallo simulado"
+    assert result.mode == 'RGBA'
@@ -0,0 +1,84 @@
+"""
+Tests de la cuantización INT8 con un modelo ONNX mínimo generado en el test
+"""
+
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip('onnx')
+pytest.importorskip('onnxruntime')
+
+from onnx import TensorProto, helper, numpy_helper
+
+from src.quantization import compare_models, quantize_model, quantized_model_path
+
+
+@pytest.fixture
+def conv_model(tmp_path):
+    """Modelo de una convolución 3 -> 1 canales con la forma de un modelo de segmentación."""
+    rng = np.random.default_rng(0)
+    weight = numpy_helper.from_array(rng.standard_normal((1, 3, 3, 3)).astype(np.float32), 'weight')
+    bias = numpy_helper.from_array(np.zeros(1, dtype=np.float32), 'bias')
+    node = helper.make_node('Conv', ['input', 'weight', 'bias'], ['output'], pads=[1, 1, 1, 1])
+    graph = helper.make_graph(
+        [node], 'conv',
+        [helper.make_tensor_value_info('input', TensorProto.FLOAT, [1, 3, 32, 32])],
+        [helper.make_tensor_value_info('output', TensorProto.FLOAT, [1, 1, 32, 32])],
+        initializer=[weight, bias]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    # Versión IR que entiende cualquier onnxruntime reciente, aunque onnx sea más nuevo
+    model.ir_version = 8
+    path = tmp_path / 'conv.onnx'
+    onnx.save(model, str(path))
+    return str(path)
+
+
+def test_quantize_model_writes_int8_copy(conv_model):
+    int8_path = quantize_model(conv_model)
+
+    assert int8_path == quantized_model_path(conv_model)
+    assert int8_path.endswith('conv.int8.onnx')
+    # Ya existe: se reutiliza sin regenerar
+    assert quantize_model(conv_model) == int8_path
+
+
+def test_compare_models_reports_speed_iou_and_size(conv_model):
+    int8_path = quantize_model(conv_model)
+
+    report = compare_models(conv_model, int8_path, repeat=1)
+
+    assert set(report) == {'fp32_ms', 'int8_ms', 'speedup', 'iou', 'fp32_size', 'int8_size'}
+    assert report['fp32_ms'] > 0 and report['int8_ms'] > 0
+    assert 0.0 <= report['iou'] <= 1.0
+    assert report['fp32_size'] > 0 and report['int8_size'] > 0
+
+
+def test_quantize_model_regenerates_unreadable_copy(conv_model, tmp_path):
+    # Copia a medias de una ejecución interrumpida
+    int8_path = quantized_model_path(conv_model)
+    with open(int8_path, 'wb') as handle:
+        handle.write(b'\x08\x07truncado')
+
+    assert quantize_model(conv_model) == int8_path
+
+    import onnxruntime as ort
+    ort.InferenceSession(int8_path, providers=['CPUExecutionProvider'])
+    # El temporal se mueve al destino: no queda nada más en el directorio
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['conv.int8.onnx', 'conv.onnx']
+
+
+def test_load_quantized_session_only_loads_int8(conv_model, monkeypatch):
+    pytest.importorskip('rembg')
+    from rembg.sessions.u2net import U2netSession
+
+    from src import quantization
+
+    monkeypatch.setattr(U2netSession, 'download_models',
+                        classmethod(lambda cls, *args, **kwargs: conv_model))
+    session = quantization.load_quantized_session('u2net')
+
+    assert isinstance(session, U2netSession)
+    assert session.name() == 'u2net'
+    assert session.providers == ['CPUExecutionProvider']
+    assert session.inner_session._model_path == quantized_model_path(conv_model)
@@ -0,0 +1,100 @@
+"""
+Tests del protocolo NDJSON del servidor stdin/stdout con un removedor simulado
+"""
+
+import base64
+import io
+import json
+
+from PIL import Image
+
+from src.stdio_server import StdioServer
+
+
+class StubRemover:
+    """Removedor mínimo: mitad izquierda objeto, mitad derecha fondo."""
+
+    def remove_background_with_info(self, image):
+        result = image.convert('RGBA')
+        alpha = Image.new('L', image.size, 0)
+        alpha.paste(255, (0, 0, image.width // 2, image.height))
+        result.putalpha(alpha)
+        return result, {'path': 'primary', 'model': 'stub', 'elapsed': 0.001}
+
+    def apply_white_background(self, image):
+        return self.apply_background(image, color=(255, 255, 255))
+
+    def apply_background(self, image, color=None, background_image=None):
+        background = Image.new('RGBA', image.size, tuple(color or (255, 255, 255)) + (255,))
+        return Image.alpha_composite(background, image).convert('RGB')
+
+
+def _serve(lines):
+    stdout = io.StringIO()
+    handled = StdioServer(StubRemover()).serve(io.StringIO('\n'.join(lines) + '\n'), stdout)
+    responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert handled == len(responses)
+    return responses
+
+
+def _decode(data):
+    return Image.open(io.BytesIO(base64.b64decode(data)))
+
+
+def test_serve_keeps_order_and_ids(tmp_path):
+    source = tmp_path / 'foto.jpg'
+    Image.new('RGB', (40, 20), (200, 30, 30)).save(source)
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 20), (30, 30, 200)).save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    target = tmp_path / 'salida.png'
+
+    responses = _serve([
+        json.dumps({'id': 'ruta', 'input': str(source), 'output': str(target),
+                    'output_format': 'transparent-png'}),
+        json.dumps({'id': 2, 'data': encoded, 'resize': '20'}),
+        '',
+        json.dumps({'id': 3, 'data': encoded, 'output_format': ['white-bg', 'mask']}),
+        '[1, 2]',
+        '{"id": 5, "input": ',
+        json.dumps({'id': 6, 'input': str(tmp_path / 'no_existe.jpg')}),
+    ])
+
+    # Las líneas vacías se ignoran; el resto responde en el mismo orden
+    assert [response['id'] for response in responses] == ['ruta', 2, 3, None, None, 6]
+
+    # Petición con ruta: la salida se escribe en disco
+    assert responses[0]['ok'] is True
+    assert responses[0]['output'] == str(target)
+    assert responses[0]['path'] == 'primary'
+    assert set(responses[0]['timings']) == {'decode_ms', 'inference_ms', 'process_ms',
+                                              'encode_ms', 'total_ms'}
+    assert Image.open(target).mode == 'RGBA'
+
+    # Petición en base64 con resize como cadena
+    assert responses[1]['ok'] is True
+    assert responses[1]['format'] == 'JPEG'
+    assert _decode(responses[1]['data']).size == (20, 10)
+
+    # Varios formatos: una salida por formato
+    assert responses[2]['ok'] is True
+    outputs = responses[2]['outputs']
+    assert set(outputs) == {'white-bg', 'mask'}
+    assert outputs['mask']['format'] == 'PNG'
+    assert _decode(outputs['mask']['data']).mode == 'L'
+
+    # Línea que no es un objeto y JSON inválido
+    for response in (responses[3], responses[4]):
+        assert response['ok'] is False
+        assert response['error'].startswith('Petición inválida')
+
+    # Error de una petición concreta: se informa sin detener el servidor
+    assert responses[5]['ok'] is False
+    assert 'error' in responses[5]
+
+
+def test_invalid_resize_is_rejected():
+    responses = _serve([json.dumps({'id': 1, 'data': 'AAAA', 'resize': 0})])
+
+    assert responses[0]['ok'] is False
+    assert 'resize' in responses[0]['error']